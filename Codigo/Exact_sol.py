@@ -1,37 +1,35 @@
 
-from data_structures import Order, Runner
-from gurobipy import Model, GRB, quicksum
+import time
+from typing import Dict, List, Optional
 from Instance import Instance
+from modelo_milp import ModeloMILP, crear_solver
+from cotas import alcanza_cota, cota_lp_k, cota_lp_ratio, cota_ratio, cotas_por_k
 
-def exact_solution(instance: Instance) -> float:
+def exact_solution(instance: Instance, tiempo_limite: Optional[float] = None, verbose: bool = True,
+                   backend: Optional[str] = None, gap: Optional[float] = None, hilos: Optional[int] = None,
+                   tiempos: Optional[List[Dict]] = None, gap_cota: float = 0.0, usar_lp: bool = False) -> float:
     '''
     Descripción: Función que resuelve una instancia evaluando diferentes cantidades de corredores
-                 con límite de tiempo de 30 segundos por modelo
+                 con límite de tiempo de 30 segundos por modelo. El modelo se construye una sola vez
+                 y para cada k sólo se cambian las cotas de la fila de corredores. Se omiten los k cuya cota
+                 no supera la incumbente y se termina cuando la incumbente alcanza (con gap_cota) la cota de los k restantes.
     
     Args:
         instance (Instance): Instancia del problema
+        tiempo_limite (Optional[float]): Tiempo total en segundos para todos los modelos; cada modelo usa
+            como máximo 30 segundos o lo que quede. Si es None no hay límite total.
+        verbose (bool): Si se imprime el progreso y la mejor solución
+        backend (Optional[str]): "gurobi" o "highs" (por defecto, Gurobi si está instalado)
+        gap (Optional[float]): Gap relativo con el que el solver puede detenerse
+        hilos (Optional[int]): Hilos del solver
+        tiempos (Optional[List[Dict]]): Si se entrega, se le agrega por cada k un diccionario con k,
+            construccion (segundos armando o ajustando el modelo) y resolucion (segundos del solver)
+        gap_cota (float): Gap relativo con la cota con el que se deja de buscar
+        usar_lp (bool): Si la cota de cada k se refuerza con la relajación lineal (más lenta)
         
     Returns:
         mejor_ratio (float): Mejor razón unidades/corredores encontrada
     '''
-    orders = instance.orders
-    runners = instance.runners
-    ub = instance.ub
-    lb = instance.lb
-
-    # Conjuntos usando índices originales
-    O = {order.index for order in orders}
-    A = {runner.index for runner in runners}
-    
-    # Conjunto de ítems
-    I = set()
-    for order in orders:
-        I.update(order.items.keys())
-
-    # Diccionarios para mapeo
-    order_dict = {order.index: order for order in orders}
-    runner_dict = {runner.index: runner for runner in runners}
-
     # Inicializar mejor solución
     mejor_ratio = 0.0
     mejor_k = 0
@@ -40,78 +38,69 @@ def exact_solution(instance: Instance) -> float:
     mejores_corredores = []
 
     # Evaluar diferentes cantidades de corredores (k)
-    max_k = min(5, len(A))  # Máximo 20 corredores o todos los disponibles
+    max_k = min(5, len(instance.runners))  # Máximo 5 corredores o todos los disponibles
+    fin = time.time() + tiempo_limite if tiempo_limite is not None else None
+
+    # Modelo compartido por todos los k; el objetivo maximiza las unidades servidas
+    inicio_construccion = time.perf_counter()
+    modelo = ModeloMILP(instance)
+    solver = crear_solver(modelo, backend, hilos=hilos, gap=gap)
+    objetivo = modelo.objetivo()
+    construccion = time.perf_counter() - inicio_construccion
+    cotas = cotas_por_k(instance, max_k)
     
     for k in range(1, max_k + 1):  # Comenzar desde 1 (k=0 no puede servir órdenes)
-        modelo = Model(f"Modelo_k_{k}")
-        
-        # Configurar límite de tiempo
-        modelo.setParam('TimeLimit', 30)
-        modelo.setParam('OutputFlag', False)
-        
-        # Variables de decisión
-        x = modelo.addVars(O, vtype=GRB.BINARY, name="x_orden")
-        y = modelo.addVars(A, vtype=GRB.BINARY, name="y_pasillo")
-
-        # Restricción de stock
-        modelo.addConstrs(
-            (quicksum(order_dict[o].items.get(i, 0) * x[o] for o in O)
-            <= 
-            quicksum(runner_dict[a].stock.get(i, 0) * y[a] for a in A)
-            for i in I
-        ), name="restriccion_stock")
-
-        # Restricción de número de corredores
-        modelo.addConstr(quicksum(y[a] for a in A) == k, name="runners_limit")
-
-
-        # Restricción de ub y lb respecto a la mínima y maxima cantidad de items que se pueden llevar
-        modelo.addConstr(quicksum(x[o] * order_dict[o].items.get(i,0) for o in O for i in I) <= ub)
-        modelo.addConstr(quicksum(x[o] * order_dict[o].items.get(i,0) for o in O for i in I) >= lb)
-
-
-
-
-        # Función objetivo: maximizar unidades servidas
-        modelo.setObjective(
-            quicksum(
-                order_dict[o].items.get(i, 0) * x[o] 
-                for o in O 
-                for i in I
-            ),
-            GRB.MAXIMIZE
-        )
-
-        modelo.optimize()
+        if alcanza_cota(mejor_ratio, cotas[k - 1:].max(), gap_cota):
+            if verbose:
+                print(f"k={k}: la incumbente alcanza la cota {cotas[k - 1:].max():.2f} de los k restantes")
+            break
+        if usar_lp:
+            cotas[k - 1] = min(cotas[k - 1], cota_lp_k(modelo, k))
+        if cotas[k - 1] <= mejor_ratio:
+            if verbose:
+                print(f"k={k}: cota {cotas[k - 1]:.2f} no supera la incumbente, se omite")
+            continue
+        restante = 30 if fin is None else min(30, fin - time.time())
+        if restante <= 0:
+            break
+        # Exactamente k corredores
+        inicio_construccion = time.perf_counter()
+        modelo.fijar_corredores(k, k)
+        construccion += time.perf_counter() - inicio_construccion
+        resultado = solver.resolver(objetivo, tiempo_limite=restante)
+        if tiempos is not None:
+            tiempos.append({"k": k, "construccion": construccion, "resolucion": resultado.tiempo})
+        if verbose:
+            print(f"k={k}: construcción {construccion:.3f} s, resolución {resultado.tiempo:.3f} s")
+        construccion = 0.0
 
         # Evaluar solución si se encontró alguna solución factible
-        if modelo.SolCount > 0:
+        if resultado.factible:
             # Obtener mejor solución encontrada (aunque no sea óptima)
-            unidades_servidas = modelo.objVal
+            unidades_servidas = resultado.objetivo
             ratio_actual = unidades_servidas / k
+            status = "ÓPTIMO" if resultado.optimo else "FACTIBLE"
             
             # Actualizar mejor solución si encontramos mejor ratio
             if ratio_actual > mejor_ratio:
                 mejor_ratio = ratio_actual
                 mejor_k = k
                 mejor_unidades = unidades_servidas
-                
-                # Guardar asignaciones de la mejor solución
-                mejores_ordenes = [o for o in O if x[o].x > 0.5]
-                mejores_corredores = [a for a in A if y[a].x > 0.5]
-                
-                # Informar progreso
-                status = "ÓPTIMO" if modelo.status == GRB.OPTIMAL else "FACTIBLE"
-                print(f"k={k}: Nuevo mejor ratio {ratio_actual:.2f} ({status})")
-            else:
+                mejores_ordenes = resultado.ordenes
+                mejores_corredores = resultado.corredores
+                if verbose:
+                    print(f"k={k}: Nuevo mejor ratio {ratio_actual:.2f} ({status})")
+            elif verbose:
                 # Informar solución encontrada pero no mejor
-                status = "ÓPTIMO" if modelo.status == GRB.OPTIMAL else "FACTIBLE"
                 print(f"k={k}: Solución {status} encontrada (ratio: {ratio_actual:.2f})")
-        else:
-            print(f"k={k}: No se encontró solución factible en 30 segundos")
+        elif verbose:
+            print(f"k={k}: No se encontró solución factible en {restante:.0f} segundos")
 
-        # Liberar recursos del modelo
-        del modelo
+    # Liberar recursos del modelo
+    del solver, modelo
+
+    if not verbose:
+        return mejor_ratio, mejores_ordenes, mejores_corredores
 
     # Mostrar resultados detallados
     print("\n" + "="*50)
@@ -123,14 +112,109 @@ def exact_solution(instance: Instance) -> float:
     
     print("\nÓrdenes seleccionadas:")
     for o in mejores_ordenes:
-        order = order_dict[o]
+        order = instance.orders[o]
         print(f"  - Orden {o}: {order.items} (Total unidades: {sum(order.items.values())})")
     
     print("\nCorredores seleccionados:")
     for a in mejores_corredores:
-        runner = runner_dict[a]
+        runner = instance.runners[a]
         print(f"  - Corredor {a}: {runner.stock} (Total stock: {sum(runner.stock.values())})")
     
     print("="*50 + "\n")
     
-    return mejor_ratio, mejores_ordenes, mejores_corredores
\ No newline at end of file
+    return mejor_ratio, mejores_ordenes, mejores_corredores
+
+
+def exact_solution_dinkelbach(instance: Instance, tiempo_limite: Optional[float] = None, tiempo_iteracion: float = 30,
+                              tolerancia: float = 1e-6, max_iteraciones: int = 50, verbose: bool = True,
+                              backend: Optional[str] = None, gap: Optional[float] = None, hilos: Optional[int] = None,
+                              gap_cota: float = 0.0, usar_lp: bool = False):
+    '''
+    Descripción: Resuelve la razón unidades/corredores con el método de Dinkelbach. En vez de fijar la cantidad
+                 de corredores, resuelve una serie de modelos lineales max unidades - λ·corredores sobre un único
+                 modelo (sólo cambia el objetivo), actualizando λ con la razón de la incumbente. La cantidad de
+                 corredores queda libre y el primer modelo parte desde la solución de constructora2.
+
+    Args:
+        instance (Instance): Instancia del problema
+        tiempo_limite (Optional[float]): Tiempo total en segundos para todas las iteraciones. Si es None no hay límite total.
+        tiempo_iteracion (float): Tiempo máximo en segundos de cada modelo
+        tolerancia (float): Se detiene cuando el óptimo de unidades - λ·corredores no supera este valor
+        max_iteraciones (int): Cantidad máxima de modelos resueltos
+        verbose (bool): Si se imprime el progreso y la mejor solución
+        backend (Optional[str]): "gurobi" o "highs" (por defecto, Gurobi si está instalado)
+        gap (Optional[float]): Gap relativo con el que el solver puede detenerse
+        hilos (Optional[int]): Hilos del solver
+        gap_cota (float): Gap relativo con la cota de la razón con el que se deja de iterar
+        usar_lp (bool): Si la cota inicial se refuerza con la relajación lineal del problema fraccional
+
+    Returns:
+        mejor_ratio (float): Mejor razón unidades/corredores encontrada
+        mejores_ordenes (List[int]): Índices de las órdenes de la mejor solución
+        mejores_corredores (List[int]): Índices de los corredores de la mejor solución
+    '''
+    # Un único modelo con cantidad de corredores libre (al menos uno); entre iteraciones sólo cambia el objetivo
+    modelo = ModeloMILP(instance)
+    solver = crear_solver(modelo, backend, hilos=hilos, gap=gap)
+    cota = cota_ratio(instance)
+    if usar_lp:
+        cota = min(cota, cota_lp_ratio(modelo))
+
+    # Punto de partida: solución de constructora2 (si es factible) como incumbente y como λ inicial
+    inicial = instance.constructora2()
+    mejor_ratio = 0.0
+    mejores_ordenes = []
+    mejores_corredores = []
+    if inicial.is_factible and inicial.num_runners > 0:
+        mejor_ratio = inicial.objective_value
+        mejores_ordenes = sorted(inicial.id_selected_orders)
+        mejores_corredores = sorted(inicial.id_selected_runners)
+        if verbose:
+            print(f"constructora2: ratio inicial {mejor_ratio:.2f}")
+
+    lam = mejor_ratio
+    fin = time.time() + tiempo_limite if tiempo_limite is not None else None
+    for iteracion in range(1, max_iteraciones + 1):
+        if alcanza_cota(mejor_ratio, cota, gap_cota):
+            if verbose:
+                print(f"La incumbente alcanza la cota {cota:.4f}")
+            break
+        restante = tiempo_iteracion if fin is None else min(tiempo_iteracion, fin - time.time())
+        if restante <= 0:
+            break
+        # Arranque en caliente desde la incumbente, que vale 0 para el λ actual
+        inicio = modelo.vector(mejores_ordenes, mejores_corredores) if mejores_corredores else None
+        resultado = solver.resolver(modelo.objetivo(lam), tiempo_limite=restante, inicio=inicio)
+
+        if not resultado.factible:
+            if verbose:
+                print(f"Iteración {iteracion}: sin solución factible en {restante:.0f} segundos")
+            break
+        valor = resultado.objetivo
+        optimo = resultado.optimo
+        ordenes_it, corredores_it = resultado.ordenes, resultado.corredores
+        ratio_it = float(instance.orders_units[ordenes_it].sum()) / len(corredores_it)
+        if verbose:
+            status = "ÓPTIMO" if optimo else "FACTIBLE"
+            print(f"Iteración {iteracion}: λ={lam:.4f}, F(λ)={valor:.4f}, ratio {ratio_it:.4f} con {len(corredores_it)} corredores ({status})")
+        if ratio_it > mejor_ratio:
+            mejor_ratio, mejores_ordenes, mejores_corredores = ratio_it, ordenes_it, corredores_it
+        # Si unidades - λ·corredores <= B para toda wave, ninguna supera la razón λ + B (hay al menos un corredor)
+        if resultado.cota == resultado.cota:
+            cota = min(cota, lam + max(resultado.cota, 0.0))
+        # F(λ) <= 0 en el óptimo significa que ninguna solución supera la razón λ
+        if valor <= tolerancia or ratio_it <= lam + tolerancia:
+            break
+        lam = mejor_ratio
+
+    del solver, modelo
+
+    if verbose:
+        print("\n" + "="*50)
+        print("MEJOR SOLUCIÓN ENCONTRADA (DINKELBACH)")
+        print("="*50)
+        print(f"• Corredores utilizados: {len(mejores_corredores)}")
+        print(f"• Ratio (unidades/corredor): {mejor_ratio:.2f}")
+        print("="*50 + "\n")
+
+    return mejor_ratio, mejores_ordenes, mejores_corredores
@@ -1,11 +1,21 @@
 from data_structures import Order, Runner  # Importación de clases de estructuras de datos externas
-from typing import Dict, List  # Importación de tipos para anotaciones
-import copy  # Importación para realizar copias profundas de objetos complejos
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple  # Importación de tipos para anotaciones
+import heapq  # Cola de prioridad de órdenes agregables
+import time  # Tiempo de la reducción de instancias
+from collections import OrderedDict  # Caches LRU de evaluaciones
+from collections.abc import MutableMapping  # Vista de diccionario sobre los arreglos por ítem
+import numpy as np  # Vectores de unidades por orden/corredor
+from scipy.sparse import csr_matrix  # Matrices dispersas órdenes x ítems y corredores x ítems
+
+MAX_ITEMS_PYTHON = 64  # Hasta cuántos ítems tocados por un movimiento conviene recorrerlos en Python en vez de con NumPy
+SEMILLA_ZOBRIST = 0x5EED  # Semilla fija de las claves de Zobrist: la huella de una selección no depende de la corrida
 
 
 class Instance:
     """
     Representa una instancia del problema de optimización con órdenes y corredores disponibles.
+    Las órdenes y corredores que crean el lector y reduce() no tienen datos propios: sus ítems y cantidades son
+    tramos de orders_matrix y runners_matrix (ver filas_por_matriz).
 
     Atributos:
         orders (List[Order]): Lista de órdenes disponibles.
@@ -13,8 +23,23 @@ class Instance:
         num_items (int): Número total de tipos de ítems distintos.
         lb (int): Límite inferior de unidades para formar una wave.
         ub (int): Límite superior de unidades para formar una wave.
+        orders_matrix (csr_matrix): Matriz dispersa órdenes x ítems con la demanda de cada orden.
+        runners_matrix (csr_matrix): Matriz dispersa corredores x ítems con el stock de cada corredor.
+        orders_units (np.ndarray): Total de unidades de cada orden.
+        runners_units (np.ndarray): Total de unidades de cada corredor.
+        items_orders (csr_matrix): Índice invertido ítems x órdenes (fila i: órdenes que piden el ítem i y cuánto).
+        items_runners (csr_matrix): Índice invertido ítems x corredores (fila i: corredores con stock del ítem i y cuánto).
+        orders_por_unidades (np.ndarray): Ids de órdenes ordenados de menor a mayor total de unidades.
+        zobrist_orders (List[int]): Clave aleatoria de 63 bits de cada orden, para la huella de las soluciones.
+        zobrist_runners (List[int]): Clave aleatoria de 63 bits de cada corredor.
+        original (Optional[Instance]): Instancia de la que se obtuvo esta con reduce() (None si no es reducida).
+        mapa_ordenes (Optional[np.ndarray]): Id original de cada orden de una instancia reducida.
+        mapa_runners (Optional[np.ndarray]): Id original de cada corredor de una instancia reducida.
+        mapa_items (Optional[np.ndarray]): Id original de cada ítem de una instancia reducida.
+        estadisticas_reduccion (Optional[Dict[str, float]]): Lo que eliminó reduce() en una instancia reducida.
     """
-    def __init__(self, orders: List[Order], runners: List[Runner], num_items: int, lb: int, ub: int):
+    def __init__(self, orders: List[Order], runners: List[Runner], num_items: int, lb: int, ub: int,
+                 orders_matrix: Optional[csr_matrix] = None, runners_matrix: Optional[csr_matrix] = None):
         self.orders = orders
         self.runners = runners
         self.num_items = num_items
@@ -23,69 +48,169 @@ class Instance:
         # Convertimos los generadores a tuplas inmediatamente
         self.id_orders = tuple(order.index for order in orders)  # Ahora es una tupla
         self.id_runners = tuple(runner.index for runner in runners) # Ahora es una tupla
+        # Representación dispersa (se construye desde los diccionarios si no viene del lector)
+        if orders_matrix is None:
+            orders_matrix = matriz_por_item([order.items for order in orders], num_items)
+        if runners_matrix is None:
+            runners_matrix = matriz_por_item([runner.stock for runner in runners], num_items)
+        self.orders_matrix = orders_matrix
+        self.runners_matrix = runners_matrix
+        self.orders_units = np.asarray(orders_matrix.sum(axis=1)).ravel()
+        self.runners_units = np.asarray(runners_matrix.sum(axis=1)).ravel()
+        # Índices invertidos: para cada ítem, las órdenes que lo piden y los corredores que lo tienen
+        self.items_orders = orders_matrix.T.tocsr()
+        self.items_runners = runners_matrix.T.tocsr()
+        # Ids de órdenes de menor a mayor total de unidades (a igualdad, por id)
+        self.orders_por_unidades = np.argsort(self.orders_units, kind='stable')
+        # Claves de Zobrist: la huella de una solución es el XOR de las claves de lo seleccionado
+        azar = np.random.default_rng(SEMILLA_ZOBRIST)
+        self.zobrist_orders = azar.integers(1, 2**63, size=len(orders), dtype=np.int64).tolist()
+        self.zobrist_runners = azar.integers(1, 2**63, size=len(runners), dtype=np.int64).tolist()
+        # Sólo las instancias creadas por reduce() tienen instancia original y mapas de ids
+        self.original = None
+        self.mapa_ordenes = None
+        self.mapa_runners = None
+        self.mapa_items = None
+        self.estadisticas_reduccion = None
+
+    def ordenes_con_item(self, item: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Órdenes que piden un ítem, según el índice invertido.
 
-    def constructora1(self):
+        Args:
+            item (int): Id del ítem.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Ids de las órdenes y cantidad pedida del ítem en cada una.
         """
-        Heurística Greedy que construye una solución factible.
-        Paso 1: Selecciona órdenes en orden decreciente de unidades hasta superar el LB.
-        Paso 2: Selecciona corredores con mayor capacidad hasta cubrir la demanda total.
+        inicio, fin = self.items_orders.indptr[item], self.items_orders.indptr[item + 1]
+        return self.items_orders.indices[inicio:fin], self.items_orders.data[inicio:fin]
+
+    def runners_con_item(self, item: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Corredores que tienen stock de un ítem, según el índice invertido.
+
+        Args:
+            item (int): Id del ítem.
 
         Returns:
-            Solucion: Objeto con las órdenes y corredores seleccionados.
+            Tuple[np.ndarray, np.ndarray]: Ids de los corredores y stock del ítem en cada uno.
         """
-        LB = self.lb
+        inicio, fin = self.items_runners.indptr[item], self.items_runners.indptr[item + 1]
+        return self.items_runners.indices[inicio:fin], self.items_runners.data[inicio:fin]
 
-        # Ordena las órdenes en orden decreciente según la cantidad total de unidades
-        ordenes_ordenadas = sorted(self.orders, key=lambda o: o.total_units, reverse=False)
+    def ordenes_con_items(self, items: Iterable[int]) -> np.ndarray:
+        """
+        Órdenes que piden al menos uno de los ítems dados.
 
-        ordenes_seleccionadas = []  # Lista para almacenar las órdenes seleccionadas
-        total_unidades = 0  # Acumulador de unidades seleccionadas
+        Args:
+            items (Iterable[int]): Ids de los ítems.
 
-        # Itera sobre las órdenes hasta alcanzar o superar el LB
-        for orden in ordenes_ordenadas:
-            ordenes_seleccionadas.append(orden)
-            total_unidades += orden.total_units
-            if total_unidades > LB:
-                break  # Sale del ciclo al superar el límite inferior
+        Returns:
+            np.ndarray: Ids de las órdenes, ordenados y sin repetir.
+        """
+        return np.unique(self.items_orders[np.fromiter(items, dtype=np.int64)].indices)
 
-        # Inicializa diccionario con demanda total por ítem (todos los ítems en 0)
-        demanda_total = {i: 0 for i in range(self.num_items)}
+    def demanda_por_item(self, ids_ordenes: Iterable[int]) -> np.ndarray:
+        """
+        Calcula la demanda total por ítem de un conjunto de órdenes con un producto matriz-vector.
 
-        # Suma la demanda total por ítem de las órdenes seleccionadas
-        for orden in ordenes_seleccionadas:
-            for item, qty in orden.items.items():
-                demanda_total[item] += qty
+        Args:
+            ids_ordenes (Iterable[int]): Ids de las órdenes.
 
-        # Ordena corredores por capacidad total disponible (suma de stock)
-        corredores_ordenados = sorted(self.runners, key=lambda r: sum(r.stock.values()), reverse=True)
+        Returns:
+            np.ndarray: Vector de largo num_items con la demanda de cada ítem.
+        """
+        seleccion = np.zeros(len(self.orders), dtype=np.int64)
+        seleccion[list(ids_ordenes)] = 1
+        return self.orders_matrix.T @ seleccion
+
+    def stock_por_item(self, ids_runners: Iterable[int]) -> np.ndarray:
+        """
+        Calcula el stock total por ítem de un conjunto de corredores con un producto matriz-vector.
+
+        Args:
+            ids_runners (Iterable[int]): Ids de los corredores.
+
+        Returns:
+            np.ndarray: Vector de largo num_items con el stock de cada ítem.
+        """
+        seleccion = np.zeros(len(self.runners), dtype=np.int64)
+        seleccion[list(ids_runners)] = 1
+        return self.runners_matrix.T @ seleccion
+
+    def ordenes_atendibles(self, stock) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Revisa en una sola pasada vectorizada qué órdenes se pueden atender completas con un vector de stock.
+
+        Args:
+            stock (np.ndarray | Dict[int, int]): Stock por ítem (p. ej. Solucion.stock_disponible_por_item).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]:
+                - Máscara booleana de las órdenes que caben completas en el stock.
+                - Unidades faltantes de cada orden (suma sobre sus ítems de lo pedido por sobre el stock).
+        """
+        stock = vector_por_item(stock)
+        matriz = self.orders_matrix
+        # Lo que falta de cada par (orden, ítem) con la misma estructura dispersa de la matriz de órdenes
+        faltante_por_par = np.maximum(matriz.data - stock[matriz.indices], 0)
+        faltantes = csr_matrix((faltante_por_par, matriz.indices, matriz.indptr), shape=matriz.shape) @ np.ones(self.num_items, dtype=np.int64)
+        return faltantes == 0, faltantes
+
+    def cubrir_demanda(self, demanda: np.ndarray, ids_runners: Iterable[int]) -> List[int]:
+        """
+        Recorre corredores en el orden dado, acumulando su stock, hasta que el stock cubre la demanda de todos los ítems.
 
-        corredores_seleccionados = []  # Lista de corredores que serán seleccionados
-        stock_disponible = {i: 0 for i in range(self.num_items)}  # Inicialización del stock total disponible
+        Args:
+            demanda (np.ndarray): Demanda por ítem a cubrir.
+            ids_runners (Iterable[int]): Corredores en el orden en que se deben agregar.
 
-        # Itera sobre corredores hasta cubrir toda la demanda
-        for corredor in corredores_ordenados:
-            corredores_seleccionados.append(corredor)  # Agrega el corredor a la selección
-            # Suma el stock del corredor al stock disponible total
-            for item, qty in corredor.stock.items():
-                stock_disponible[item] += qty  # Acumula el stock del corredor
-            
+        Returns:
+            List[int]: Ids de los corredores agregados (todos, si la demanda no se alcanza a cubrir).
+        """
+        matriz = self.runners_matrix
+        faltante = np.array(demanda, dtype=np.int64)
+        pendientes = np.count_nonzero(faltante > 0)  # Ítems cuya demanda aún no se cubre
+        seleccionados = []
+        for id_runner in ids_runners:
+            seleccionados.append(id_runner)
+            inicio, fin = matriz.indptr[id_runner], matriz.indptr[id_runner + 1]
+            items = matriz.indices[inicio:fin]
+            estaba_pendiente = faltante[items] > 0
+            faltante[items] -= matriz.data[inicio:fin]
+            pendientes -= np.count_nonzero(estaba_pendiente & (faltante[items] <= 0))
             # Verifica si el stock actual cubre toda la demanda
-            if all(stock_disponible[i] >= demanda_total[i] for i in demanda_total):
+            if pendientes == 0:
                 break
-            else:
-                continue  # Si no cubre la demanda, continúa con el siguiente corredor
+        return seleccionados
+
+    def _constructora_greedy(self, umbral: float):
+        """
+        Greedy común de las constructoras: toma órdenes de menor a mayor cantidad de unidades hasta superar
+        el umbral y luego corredores de mayor a menor capacidad hasta cubrir la demanda total.
+        """
+        # Ordena las órdenes según la cantidad total de unidades y toma hasta superar el umbral
+        acumulado = np.cumsum(self.orders_units[self.orders_por_unidades])
+        superan = np.flatnonzero(acumulado > umbral)
+        cantidad = superan[0] + 1 if len(superan) else len(acumulado)
+        ids_ordenes = self.orders_por_unidades[:cantidad].tolist()
 
+        # Demanda total por ítem de las órdenes seleccionadas
+        demanda_total = self.demanda_por_item(ids_ordenes)
 
+        # Ordena corredores por capacidad total disponible (suma de stock) y los agrega hasta cubrir la demanda
+        corredores_ordenados = np.argsort(-self.runners_units, kind='stable').tolist()
+        ids_corredores = self.cubrir_demanda(demanda_total, corredores_ordenados)
 
         # Retorna una instancia de la solución construida
         return Solucion(
-            selected_orders=ordenes_seleccionadas,
-            selected_runners=corredores_seleccionados,
+            selected_orders=[self.orders[o] for o in ids_ordenes],
+            selected_runners=[self.runners[a] for a in ids_corredores],
             instance=self
         )
-    
 
-    def constructora2(self):
+    def constructora1(self):
         """
         Heurística Greedy que construye una solución factible.
         Paso 1: Selecciona órdenes en orden decreciente de unidades hasta superar el LB.
@@ -94,58 +219,20 @@ class Instance:
         Returns:
             Solucion: Objeto con las órdenes y corredores seleccionados.
         """
-        LB = self.lb
-        UB = self.ub
-        promedio = (LB + UB) / 2  # Calcula el promedio entre LB y UB
-
-        # Ordena las órdenes en orden decreciente según la cantidad total de unidades
-        ordenes_ordenadas = sorted(self.orders, key=lambda o: o.total_units, reverse=False)
-
-        ordenes_seleccionadas = []  # Lista para almacenar las órdenes seleccionadas
-        total_unidades = 0  # Acumulador de unidades seleccionadas
-
-        # Itera sobre las órdenes hasta alcanzar o superar el LB
-        for orden in ordenes_ordenadas:
-            ordenes_seleccionadas.append(orden)
-            total_unidades += orden.total_units
-            if total_unidades > promedio:
-                break  # Sale del ciclo al superar el límite inferior
-
-        # Inicializa diccionario con demanda total por ítem (todos los ítems en 0)
-        demanda_total = {i: 0 for i in range(self.num_items)}
-
-        # Suma la demanda total por ítem de las órdenes seleccionadas
-        for orden in ordenes_seleccionadas:
-            for item, qty in orden.items.items():
-                demanda_total[item] += qty
-
-        # Ordena corredores por capacidad total disponible (suma de stock)
-        corredores_ordenados = sorted(self.runners, key=lambda r: sum(r.stock.values()), reverse=True)
-
-        corredores_seleccionados = []  # Lista de corredores que serán seleccionados
-        stock_disponible = {i: 0 for i in range(self.num_items)}  # Inicialización del stock total disponible
-
-        # Itera sobre corredores hasta cubrir toda la demanda
-        for corredor in corredores_ordenados:
-            corredores_seleccionados.append(corredor)  # Agrega el corredor a la selección
-            # Suma el stock del corredor al stock disponible total
-            for item, qty in corredor.stock.items():
-                stock_disponible[item] += qty  # Acumula el stock del corredor
-            
-            # Verifica si el stock actual cubre toda la demanda
-            if all(stock_disponible[i] >= demanda_total[i] for i in demanda_total):
-                break
-            else:
-                continue  # Si no cubre la demanda, continúa con el siguiente corredor
-
+        return self._constructora_greedy(self.lb)
+    
 
+    def constructora2(self):
+        """
+        Heurística Greedy que construye una solución factible.
+        Paso 1: Selecciona órdenes en orden decreciente de unidades hasta superar el promedio entre LB y UB.
+        Paso 2: Selecciona corredores con mayor capacidad hasta cubrir la demanda total.
 
-        # Retorna una instancia de la solución construida
-        return Solucion(
-            selected_orders=ordenes_seleccionadas,
-            selected_runners=corredores_seleccionados,
-            instance=self
-        )
+        Returns:
+            Solucion: Objeto con las órdenes y corredores seleccionados.
+        """
+        promedio = (self.lb + self.ub) / 2  # Calcula el promedio entre LB y UB
+        return self._constructora_greedy(promedio)
         
     def constructora_vacia(self):
         """
@@ -160,6 +247,118 @@ class Instance:
             instance=self
         )
 
+    def reduce(self, quitar_dominados: bool = False) -> 'Instance':
+        """
+        Preprocesamiento que elimina lo que no puede formar parte de una wave:
+            - órdenes que piden de algún ítem más que el stock total de todos los corredores, o más unidades que UB,
+            - corredores que no tienen stock de ningún ítem pedido,
+            - ítems que ninguna orden pide.
+        Opcionalmente elimina también los corredores dominados, es decir, con stock menor o igual que el de otro
+        corredor en todos los ítems pedidos. Esto no es exacto: una wave puede necesitar al corredor dominado
+        y al que lo domina a la vez, por lo que viene desactivado.
+
+        Args:
+            quitar_dominados (bool): Si se eliminan los corredores dominados.
+
+        Returns:
+            Instance: Instancia reducida con ids consecutivos, los mapas a los ids originales (mapa_ordenes,
+            mapa_runners, mapa_items) y las estadísticas en estadisticas_reduccion.
+        """
+        inicio = time.perf_counter()
+        ordenes = np.ones(len(self.orders), dtype=bool)
+        corredores = np.ones(len(self.runners), dtype=bool)
+        sobre_ub = self.orders_units > self.ub
+        sin_stock = np.zeros(len(self.orders), dtype=bool)
+        sin_items = np.zeros(len(self.runners), dtype=bool)
+        dominados = np.zeros(len(self.runners), dtype=bool)
+        while True:
+            # Órdenes con algún ítem cuya demanda supera el stock total de los corredores que quedan
+            stock_total = np.asarray(self.runners_matrix[corredores].sum(axis=0)).ravel()
+            matriz = self.orders_matrix
+            excede = (matriz.data > stock_total[matriz.indices]).astype(np.int64)
+            sin_stock |= csr_matrix((excede, matriz.indices, matriz.indptr), shape=matriz.shape) @ np.ones(self.num_items, dtype=np.int64) > 0
+            nuevas_ordenes = ~sobre_ub & ~sin_stock
+            # Corredores sin stock de los ítems que piden las órdenes que quedan
+            pedidos = np.asarray(self.orders_matrix[nuevas_ordenes].sum(axis=0)).ravel() > 0
+            sin_items |= ~(self.runners_matrix[:, pedidos].getnnz(axis=1) > 0)
+            nuevos_corredores = ~sin_items & ~dominados
+            if quitar_dominados:
+                dominados |= _corredores_dominados(self.runners_matrix[:, pedidos], nuevos_corredores)
+                nuevos_corredores &= ~dominados
+            if np.array_equal(nuevas_ordenes, ordenes) and np.array_equal(nuevos_corredores, corredores):
+                break
+            ordenes, corredores = nuevas_ordenes, nuevos_corredores
+
+        mapa_ordenes = np.flatnonzero(ordenes)
+        mapa_runners = np.flatnonzero(corredores)
+        mapa_items = np.flatnonzero(pedidos)
+        orders_matrix = self.orders_matrix[mapa_ordenes][:, mapa_items].tocsr()
+        runners_matrix = self.runners_matrix[mapa_runners][:, mapa_items].tocsr()
+        orders = filas_por_matriz(Order, orders_matrix)
+        runners = filas_por_matriz(Runner, runners_matrix)
+        reducida = Instance(orders, runners, len(mapa_items), self.lb, self.ub,
+                            orders_matrix=orders_matrix, runners_matrix=runners_matrix)
+        reducida.original = self
+        reducida.mapa_ordenes = mapa_ordenes
+        reducida.mapa_runners = mapa_runners
+        reducida.mapa_items = mapa_items
+        reducida.estadisticas_reduccion = {
+            "ordenes": len(self.orders), "ordenes_reducidas": len(mapa_ordenes),
+            "ordenes_sobre_ub": int(np.count_nonzero(sobre_ub)),
+            "ordenes_sin_stock": int(np.count_nonzero(sin_stock & ~sobre_ub)),
+            "corredores": len(self.runners), "corredores_reducidos": len(mapa_runners),
+            "corredores_sin_items": int(np.count_nonzero(sin_items)),
+            "corredores_dominados": int(np.count_nonzero(dominados & ~sin_items)),
+            "items": self.num_items, "items_reducidos": len(mapa_items),
+            "no_nulos": self.orders_matrix.nnz + self.runners_matrix.nnz,
+            "no_nulos_reducidos": orders_matrix.nnz + runners_matrix.nnz,
+            "tiempo": time.perf_counter() - inicio,
+        }
+        return reducida
+
+    def resumen_reduccion(self) -> str:
+        """
+        Describe en una línea lo que eliminó reduce() (cadena vacía si la instancia no es reducida).
+        """
+        e = self.estadisticas_reduccion
+        if e is None:
+            return ""
+        return (f"órdenes {e['ordenes']} -> {e['ordenes_reducidas']} ({e['ordenes_sobre_ub']} sobre UB, {e['ordenes_sin_stock']} sin stock), "
+                f"corredores {e['corredores']} -> {e['corredores_reducidos']} ({e['corredores_sin_items']} sin ítems pedidos, "
+                f"{e['corredores_dominados']} dominados), ítems {e['items']} -> {e['items_reducidos']}, "
+                f"no nulos {e['no_nulos']} -> {e['no_nulos_reducidos']}, {e['tiempo']:.3f} s")
+
+    def ids_originales(self, ids_ordenes: Iterable[int], ids_runners: Iterable[int]) -> Tuple[List[int], List[int]]:
+        """
+        Traduce ids de órdenes y corredores de esta instancia a los de la instancia original.
+
+        Args:
+            ids_ordenes (Iterable[int]): Ids de órdenes en esta instancia.
+            ids_runners (Iterable[int]): Ids de corredores en esta instancia.
+
+        Returns:
+            Tuple[List[int], List[int]]: Ids originales (los mismos si la instancia no es reducida).
+        """
+        ids_ordenes, ids_runners = list(ids_ordenes), list(ids_runners)
+        if self.original is None:
+            return ids_ordenes, ids_runners
+        return self.mapa_ordenes[ids_ordenes].tolist(), self.mapa_runners[ids_runners].tolist()
+
+    def solucion_original(self, solucion: 'Solucion') -> 'Solucion':
+        """
+        Convierte una solución de esta instancia en la misma solución sobre la instancia original.
+
+        Args:
+            solucion (Solucion): Solución sobre esta instancia.
+
+        Returns:
+            Solucion: Solución equivalente sobre la instancia original (la misma si la instancia no es reducida).
+        """
+        if self.original is None:
+            return solucion
+        ids_ordenes, ids_runners = self.ids_originales(solucion.id_selected_orders, solucion.id_selected_runners)
+        return Solucion([self.original.orders[o] for o in ids_ordenes], [self.original.runners[a] for a in ids_runners], self.original)
+
 
 
 
@@ -176,6 +375,422 @@ class Instance:
         return f"Instance with {len(self.orders)} orders and {len(self.runners)} runners, covering {self.num_items} item"
 
 
+def matriz_por_item(filas: List[Dict[int, int]], num_items: int) -> csr_matrix:
+    """
+    Construye una matriz CSR a partir de una lista de diccionarios item_id -> cantidad.
+
+    Args:
+        filas (List[Dict[int, int]]): Un diccionario por fila (orden o corredor).
+        num_items (int): Número de columnas (ítems).
+
+    Returns:
+        csr_matrix: Matriz de tamaño len(filas) x num_items.
+    """
+    indptr = np.zeros(len(filas) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(fila) for fila in filas])
+    indices = np.fromiter((item for fila in filas for item in fila), dtype=np.int32, count=indptr[-1])
+    data = np.fromiter((cantidad for fila in filas for cantidad in fila.values()), dtype=np.int64, count=indptr[-1])
+    return csr_matrix((data, indices, indptr), shape=(len(filas), num_items))
+
+
+def filas_por_matriz(clase, matriz: csr_matrix) -> List:
+    """
+    Crea una Order o un Runner por fila de una matriz CSR (inversa de matriz_por_item). Las filas son tramos de
+    matriz.indices y matriz.data, que quedan compartidos por todas ellas sin copiarse.
+
+    Args:
+        clase (type): Order o Runner.
+        matriz (csr_matrix): Matriz filas x ítems.
+
+    Returns:
+        List: Una fila por cada fila de la matriz, con index igual a su posición.
+    """
+    punteros = matriz.indptr.tolist()
+    unidades = np.asarray(matriz.sum(axis=1)).ravel().tolist()
+    desde_arreglos = clase.desde_arreglos
+    return [desde_arreglos(j, matriz.indices, matriz.data, punteros[j], punteros[j + 1], unidades[j])
+            for j in range(matriz.shape[0])]
+
+
+def _corredores_dominados(stock: csr_matrix, candidatos: np.ndarray) -> np.ndarray:
+    """
+    Marca los corredores candidatos cuyo stock es menor o igual, ítem a ítem, que el de otro candidato.
+    Entre corredores con el mismo stock se conserva el de menor id.
+
+    Args:
+        stock (csr_matrix): Matriz corredores x ítems (sólo los ítems que importan).
+        candidatos (np.ndarray): Máscara de los corredores a comparar.
+
+    Returns:
+        np.ndarray: Máscara de los corredores dominados.
+    """
+    stock = csr_matrix(stock.multiply(candidatos[:, None]))
+    stock.eliminate_zeros()
+    por_item = stock.T.tocsr()  # Para cada ítem, corredores que lo tienen y cuánto
+    unidades = np.asarray(stock.sum(axis=1)).ravel()
+    largo_columna = np.diff(por_item.indptr)
+    dominados = np.zeros(stock.shape[0], dtype=bool)
+    for b in np.flatnonzero(candidatos):
+        inicio, fin = stock.indptr[b], stock.indptr[b + 1]
+        if inicio == fin:
+            continue
+        items, cantidades = stock.indices[inicio:fin], stock.data[inicio:fin]
+        posibles = None
+        # Empieza por los ítems que menos corredores tienen, para descartar rápido
+        for k in np.argsort(largo_columna[items], kind='stable'):
+            c_inicio, c_fin = por_item.indptr[items[k]], por_item.indptr[items[k] + 1]
+            cubren = por_item.indices[c_inicio:c_fin][por_item.data[c_inicio:c_fin] >= cantidades[k]]
+            posibles = cubren if posibles is None else np.intersect1d(posibles, cubren, assume_unique=True)
+            posibles = posibles[(unidades[posibles] > unidades[b]) | ((unidades[posibles] == unidades[b]) & (posibles < b))]
+            if len(posibles) == 0:
+                break
+        dominados[b] = len(posibles) > 0
+    return dominados
+
+
+class VistaPorItem(MutableMapping):
+    """
+    Vista con interfaz de diccionario item_id -> valor (claves 0..n-1) sobre un arreglo por ítem de una solución,
+    para el código que usa los agregados por ítem como diccionarios. Lee y escribe directamente el arreglo.
+
+    Atributos:
+        arreglo (np.ndarray): Arreglo por ítem subyacente (no es una copia).
+    """
+    __slots__ = ('arreglo',)
+
+    def __init__(self, arreglo: np.ndarray):
+        self.arreglo = arreglo
+
+    def __getitem__(self, item: int) -> int:
+        if not 0 <= item < len(self.arreglo):
+            raise KeyError(item)
+        return int(self.arreglo[item])
+
+    def __setitem__(self, item: int, valor: int):
+        if not 0 <= item < len(self.arreglo):
+            raise KeyError(item)
+        self.arreglo[item] = valor
+
+    def __delitem__(self, item: int):
+        raise TypeError("No se pueden eliminar ítems de una vista por ítem")
+
+    def __iter__(self):
+        return iter(range(len(self.arreglo)))
+
+    def __len__(self) -> int:
+        return len(self.arreglo)
+
+    def values(self) -> List[int]:
+        return self.arreglo.tolist()
+
+    def items(self) -> List[Tuple[int, int]]:
+        return list(enumerate(self.arreglo.tolist()))
+
+    def copy(self) -> Dict[int, int]:
+        return dict(enumerate(self.arreglo.tolist()))
+
+    def __repr__(self):
+        return f"VistaPorItem({self.copy()})"
+
+
+def filas_concatenadas(matriz: csr_matrix, ids, signo: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ítems y cantidades de varias filas de una matriz CSR, concatenados (un ítem se repite si está en varias filas).
+
+    Args:
+        matriz (csr_matrix): Matriz órdenes x ítems o corredores x ítems.
+        ids: Ids de las filas.
+        signo (int): Factor de las cantidades (-1 para restarlas).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Ítems y cantidades.
+    """
+    indptr, indices, data = matriz.indptr, matriz.indices, matriz.data
+    if len(ids) == 1:
+        inicio, fin = indptr[ids[0]], indptr[ids[0] + 1]
+        return indices[inicio:fin], data[inicio:fin] * signo
+    tramos = [slice(indptr[i], indptr[i + 1]) for i in ids]
+    return (np.concatenate([indices[t] for t in tramos]) if tramos else indices[:0],
+            np.concatenate([data[t] for t in tramos]) * signo if tramos else data[:0])
+
+
+def variacion_deficit(anterior: np.ndarray, nuevo: np.ndarray) -> Tuple[int, int]:
+    """
+    Cambio en las unidades faltantes y en la cantidad de ítems con déficit cuando el stock disponible de unos
+    ítems pasa de anterior a nuevo.
+
+    Returns:
+        Tuple[int, int]: Cambio en deficit_total y en num_items_deficit.
+    """
+    if len(anterior) <= MAX_ITEMS_PYTHON:
+        # Con pocos ítems un ciclo en Python es más rápido que varias llamadas a NumPy
+        deficit = items = 0
+        for antes, despues in zip(anterior.tolist(), nuevo.tolist()):
+            if antes < 0:
+                deficit += antes
+                items -= 1
+            if despues < 0:
+                deficit -= despues
+                items += 1
+        return deficit, items
+    return (int(np.minimum(anterior, 0).sum() - np.minimum(nuevo, 0).sum()),
+            int(np.count_nonzero(nuevo < 0) - np.count_nonzero(anterior < 0)))
+
+
+def _unir(partes: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatena pares (ítems, cantidades)."""
+    if len(partes) == 1:
+        return partes[0]
+    if not partes:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+    return np.concatenate([p[0] for p in partes]), np.concatenate([p[1] for p in partes])
+
+
+def vector_por_item(valores) -> np.ndarray:
+    """
+    Convierte valores por ítem (diccionario item_id -> valor con claves 0..n-1, vista por ítem o arreglo) en un arreglo de NumPy.
+    """
+    if isinstance(valores, VistaPorItem):
+        return valores.arreglo
+    if isinstance(valores, dict):
+        return np.fromiter(valores.values(), dtype=np.int64, count=len(valores))
+    return np.asarray(valores)
+
+
+class OrdenesAgregables:
+    """
+    Conjunto, mantenido incrementalmente, de las órdenes no seleccionadas que caben completas en el
+    stock disponible de una solución.
+
+    Para cada orden se cuenta cuántos de sus ítems piden más de lo disponible (faltantes). Cuando cambia
+    el stock disponible de un ítem sólo se revisan las órdenes que piden ese ítem (índice invertido).
+    Las órdenes con 0 faltantes se guardan en un heap por total de unidades (mayor primero); las entradas
+    que dejan de ser válidas se descartan al consultar.
+
+    Atributos:
+        instance (Instance): Instancia del problema.
+        faltantes (np.ndarray): Por orden, número de ítems cuya cantidad pedida supera el stock disponible.
+        seleccionadas (np.ndarray): Máscara de órdenes seleccionadas (la misma de la solución, no una copia).
+        heap (List[Tuple[int, int]]): Entradas (-total_units, id_orden) de órdenes agregables.
+    """
+    def __init__(self, instance: "Instance", stock_disponible: np.ndarray, seleccionadas: np.ndarray):
+        self.instance = instance
+        matriz = instance.orders_matrix
+        num_ordenes = matriz.shape[0]
+        filas = np.repeat(np.arange(num_ordenes), np.diff(matriz.indptr))
+        cortas = matriz.data > stock_disponible[matriz.indices]
+        self.faltantes = np.bincount(filas[cortas], minlength=num_ordenes).astype(np.int32)
+        self.seleccionadas = seleccionadas
+        self._reconstruir_heap()
+
+    def _reconstruir_heap(self):
+        """
+        Reconstruye el heap sólo con las órdenes agregables actuales (descarta entradas obsoletas).
+        """
+        ids = np.flatnonzero((self.faltantes == 0) & ~self.seleccionadas)
+        self.heap = list(zip((-self.instance.orders_units[ids]).tolist(), ids.tolist()))
+        heapq.heapify(self.heap)
+
+    def copiar(self, seleccionadas: np.ndarray) -> "OrdenesAgregables":
+        """
+        Copia el estado (faltantes y heap) compartiendo la instancia y usando la máscara de selección
+        de la solución copiada.
+        """
+        nueva = OrdenesAgregables.__new__(OrdenesAgregables)
+        nueva.instance = self.instance
+        nueva.faltantes = self.faltantes.copy()
+        nueva.seleccionadas = seleccionadas
+        nueva.heap = list(self.heap)
+        return nueva
+
+    def actualizar_item(self, item: int, anterior: int, nuevo: int):
+        """
+        Actualiza los faltantes de las órdenes que piden un ítem cuyo stock disponible pasó de anterior a nuevo.
+        """
+        if anterior == nuevo:
+            return
+        ids, cantidades = self.instance.ordenes_con_item(item)
+        antes = cantidades > anterior
+        despues = cantidades > nuevo
+        cambia = antes != despues
+        if not cambia.any():
+            return
+        ids = ids[cambia]
+        self.faltantes[ids] += np.where(despues[cambia], 1, -1).astype(np.int32)
+        if nuevo > anterior:
+            for id_orden in ids[(self.faltantes[ids] == 0) & ~self.seleccionadas[ids]].tolist():
+                heapq.heappush(self.heap, (-int(self.instance.orders_units[id_orden]), id_orden))
+            if len(self.heap) > 2 * len(self.faltantes) + 64:
+                self._reconstruir_heap()
+
+    def liberar(self, id_orden: int):
+        """Avisa que una orden dejó de estar seleccionada; vuelve al heap si cabe en el stock disponible."""
+        if self.faltantes[id_orden] == 0:
+            heapq.heappush(self.heap, (-int(self.instance.orders_units[id_orden]), id_orden))
+
+    def mejor(self) -> Optional[int]:
+        """
+        Orden agregable con más unidades (a igualdad, la de menor id).
+
+        Returns:
+            Optional[int]: Id de la orden, o None si ninguna orden no seleccionada cabe en el stock disponible.
+        """
+        while self.heap:
+            _, id_orden = self.heap[0]
+            if self.seleccionadas[id_orden] or self.faltantes[id_orden] > 0:
+                heapq.heappop(self.heap)
+                continue
+            return id_orden
+        return None
+
+
+class Movimiento(NamedTuple):
+    """
+    Cambio sobre una solución expresado con los ids de órdenes y corredores que entran y salen.
+
+    Atributos:
+        agregar_ordenes (Tuple[int, ...]): Ids de órdenes no seleccionadas que se agregan.
+        eliminar_ordenes (Tuple[int, ...]): Ids de órdenes seleccionadas que se eliminan.
+        agregar_runners (Tuple[int, ...]): Ids de corredores no seleccionados que se agregan.
+        eliminar_runners (Tuple[int, ...]): Ids de corredores seleccionados que se eliminan.
+    """
+    agregar_ordenes: Tuple[int, ...] = ()
+    eliminar_ordenes: Tuple[int, ...] = ()
+    agregar_runners: Tuple[int, ...] = ()
+    eliminar_runners: Tuple[int, ...] = ()
+
+
+class DeltaMovimiento(NamedTuple):
+    """
+    Resultado de evaluar un movimiento sin aplicarlo.
+
+    Atributos:
+        delta_objetivo (float): Cambio en objective_value.
+        delta_costo_infactible (float): Cambio en costo_infactible().
+        es_factible (bool): Factibilidad de la solución después del movimiento.
+    """
+    delta_objetivo: float
+    delta_costo_infactible: float
+    es_factible: bool
+
+
+class Evaluacion(NamedTuple):
+    """
+    Valor objetivo, costo de infactibilidad y factibilidad de una solución (o de la que resulta de un movimiento).
+    """
+    objetivo: float
+    costo_infactible: float
+    es_factible: bool
+
+
+class CacheEvaluaciones:
+    """
+    Cache LRU acotado de huella de solución -> Evaluacion. Como la huella identifica la selección de órdenes y
+    corredores, sirve también como lista tabú de soluciones visitadas (huella in cache).
+
+    Atributos:
+        capacidad (int): Máximo de huellas guardadas.
+        aciertos (int): Búsquedas encontradas.
+        fallos (int): Búsquedas no encontradas.
+    """
+    def __init__(self, capacidad: int = 4096):
+        self.capacidad = capacidad
+        self.entradas: "OrderedDict[int, Evaluacion]" = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def buscar(self, huella: int) -> Optional[Evaluacion]:
+        evaluacion = self.entradas.get(huella)
+        if evaluacion is None:
+            self.fallos += 1
+            return None
+        self.entradas.move_to_end(huella)
+        self.aciertos += 1
+        return evaluacion
+
+    def guardar(self, huella: int, evaluacion: Evaluacion):
+        self.entradas[huella] = evaluacion
+        self.entradas.move_to_end(huella)
+        if len(self.entradas) > self.capacidad:
+            self.entradas.popitem(last=False)
+
+    def __contains__(self, huella: int) -> bool:
+        return huella in self.entradas
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def resumen(self) -> Dict[str, float]:
+        consultas = self.aciertos + self.fallos
+        return {'aciertos': self.aciertos, 'fallos': self.fallos, 'guardadas': len(self.entradas),
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0}
+
+
+class ContadorPerezosos:
+    """
+    Cuenta, por atributo perezoso de Solucion, cuántos cálculos quedaron pendientes (al crear una solución o al
+    invalidar un valor ya calculado) y cuántos se hicieron de verdad; la diferencia es el trabajo evitado.
+
+    Atributos:
+        programados (Dict[str, int]): Cálculos que quedaron pendientes.
+        calculados (Dict[str, int]): Cálculos hechos al leer el atributo.
+    """
+    def __init__(self):
+        self.programados: Dict[str, int] = {}
+        self.calculados: Dict[str, int] = {}
+
+    def reiniciar(self):
+        self.programados = dict.fromkeys(self.programados, 0)
+        self.calculados = dict.fromkeys(self.calculados, 0)
+
+    def resumen(self) -> Dict[str, Dict[str, int]]:
+        return {nombre: {'programados': programados, 'calculados': self.calculados.get(nombre, 0),
+                         'evitados': programados - self.calculados.get(nombre, 0)}
+                for nombre, programados in self.programados.items()}
+
+
+contador_perezosos = ContadorPerezosos()  # Contadores de todas las soluciones del proceso
+
+
+class AtributoPerezoso:
+    """
+    Atributo derivado de Solucion que se calcula la primera vez que se lee y queda guardado en el __dict__ de la
+    solución (las lecturas siguientes no pasan por aquí), hasta que la solución lo invalida al cambiar la selección.
+    Los atributos que se calculan juntos comparten el nombre del grupo en los contadores.
+    """
+    def __init__(self, calcular: Callable[["Solucion"], object], grupo: Optional[str] = None):
+        self.calcular = calcular
+        self.grupo = grupo
+        self.__doc__ = calcular.__doc__
+
+    def __set_name__(self, clase, nombre: str):
+        self.nombre = nombre
+        self.grupo = self.grupo or nombre
+        contador_perezosos.programados.setdefault(self.grupo, 0)
+        contador_perezosos.calculados.setdefault(self.grupo, 0)
+
+    def __get__(self, solucion: Optional["Solucion"], clase=None):
+        if solucion is None:
+            return self
+        valor = self.calcular(solucion)
+        solucion.__dict__[self.nombre] = valor
+        contador_perezosos.calculados[self.grupo] += 1
+        return valor
+
+
+AGREGADOS_POR_ITEM = ('vector_demanda', 'vector_stock', 'vector_disponible', 'deficit_total', 'num_items_deficit')
+PEREZOSOS = ('total_units_runner', 'diversity_runners', 'diversity_orders', 'huella', 'is_factible') + AGREGADOS_POR_ITEM
+GRUPOS_PEREZOSOS = ('total_units_runner', 'diversity_runners', 'diversity_orders', 'huella', 'is_factible', 'agregados_por_item')
+
+
+def _agregado(nombre: str) -> AtributoPerezoso:
+    """Atributo perezoso que se obtiene recalculando todos los agregados por ítem de la solución."""
+    def calcular(solucion: "Solucion"):
+        solucion.recalcular_agregados_por_item()
+        return solucion.__dict__[nombre]
+    return AtributoPerezoso(calcular, grupo='agregados_por_item')
+
+
 class Solucion:
     """
     Clase que representa una solución factible al problema de asignación de órdenes a corredores.
@@ -184,32 +799,153 @@ class Solucion:
         selected_orders (List[Order]): Órdenes seleccionadas.
         selected_runners (List[Runner]): Corredores seleccionados.
         instance (Instance): Instancia del problema a la que pertenece la solución.
+        vector_demanda (np.ndarray): Demanda total por ítem de las órdenes seleccionadas.
+        vector_stock (np.ndarray): Stock total por ítem de los corredores seleccionados.
+        vector_disponible (np.ndarray): Stock menos demanda por ítem.
+        demanda_total_por_item, stock_total_por_item, stock_disponible_por_item (VistaPorItem): Los mismos
+            arreglos con interfaz de diccionario.
+
+    Los atributos derivados costosos (PEREZOSOS: agregados por ítem, factibilidad, huella, unidades de los corredores
+    y diversidad de ítems) se calculan recién al leerlos y se invalidan cuando cambia la selección.
     """
     def __init__(self, selected_orders: List[Order], selected_runners: List[Runner], instance: Instance):
         self.selected_orders = selected_orders
         self.selected_runners = selected_runners
         self.instance = instance
         self.total_units_order = sum(order.total_units for order in selected_orders)  # Total de unidades entregadas en las órdenes
-        self.total_units_runner = sum(runner.total_units for runner in selected_runners) #Total de unidades entregadas en los Runners
-        self.diversity_runners = list({item_id for runner in selected_runners for item_id in runner.stock}) #Ítems usados en la solución en runners
-        self.diversity_orders = list({item_id for order in selected_orders for item_id in order.items}) #Ítems usados en la solución en órdenes
-        self.demanda_total_por_item = {i: 0 for i in range(self.instance.num_items)}  # Inicializa demanda total por ítem
-        for order in self.selected_orders:
-            for item, quantity in order.items.items():
-                self.demanda_total_por_item[item] += quantity
-                
-        self.stock_total_por_item = {i: 0 for i in range(self.instance.num_items)}  # Inicializa stock total por ítem
-        for runner in self.selected_runners:
-            for item, quantity in runner.stock.items():
-                self.stock_total_por_item[item] += quantity
-        
         self.num_runners = len(selected_runners)  # Número de corredores usados
         self.num_orders = len(self.selected_orders) # Número de órdenes usadas
         self.objective_value = self.set_objective_value()  # Valor objetivo de la solución
-        self.is_factible = self.set_is_factible()  # Factibilidad de la solución
-        self.stock_disponible_por_item = self.determinar_stock_disponible_por_item()  # Stock disponible por ítem
         self.id_selected_orders = tuple(order.index for order in selected_orders)  # Tupla de índices de órdenes seleccionadas
         self.id_selected_runners = tuple(runner.index for runner in selected_runners)  # Tupla de índices de corredores seleccionados
+        self._ordenes_agregables = None  # Se construye al pedirla en ordenes_agregables()
+        self.recalcular_mascaras()  # Máscaras booleanas de órdenes y corredores seleccionados
+        for grupo in GRUPOS_PEREZOSOS:
+            contador_perezosos.programados[grupo] += 1
+
+    def _total_units_runner(self) -> int:
+        """Total de unidades de los corredores seleccionados."""
+        return sum(runner.total_units for runner in self.selected_runners)
+
+    def _diversity_runners(self) -> List[int]:
+        """Ítems distintos con stock en los corredores seleccionados."""
+        return list({item_id for runner in self.selected_runners for item_id in runner.item_ids.tolist()})
+
+    def _diversity_orders(self) -> List[int]:
+        """Ítems distintos pedidos por las órdenes seleccionadas."""
+        return list({item_id for order in self.selected_orders for item_id in order.item_ids.tolist()})
+
+    def _huella(self) -> int:
+        """Huella de Zobrist de la selección (ver recalcular_huella)."""
+        huella = 0
+        for id_orden in self.id_selected_orders:
+            huella ^= self.instance.zobrist_orders[id_orden]
+        for id_runner in self.id_selected_runners:
+            huella ^= self.instance.zobrist_runners[id_runner]
+        return huella
+
+    total_units_runner = AtributoPerezoso(_total_units_runner)  # Total de unidades entregadas en los Runners
+    diversity_runners = AtributoPerezoso(_diversity_runners)  # Ítems usados en la solución en runners
+    diversity_orders = AtributoPerezoso(_diversity_orders)  # Ítems usados en la solución en órdenes
+    huella = AtributoPerezoso(_huella)  # Huella de Zobrist de la selección
+    is_factible = AtributoPerezoso(lambda solucion: solucion.set_is_factible())  # Factibilidad de la solución
+    vector_demanda = _agregado('vector_demanda')
+    vector_stock = _agregado('vector_stock')
+    vector_disponible = _agregado('vector_disponible')
+    deficit_total = _agregado('deficit_total')
+    num_items_deficit = _agregado('num_items_deficit')
+
+    def invalidar(self, nombres: Iterable[str]):
+        """
+        Descarta los valores calculados de atributos perezosos, para que se recalculen al volver a leerlos.
+        Al invalidar los agregados por ítem se descarta también el conjunto de órdenes agregables.
+
+        Args:
+            nombres (Iterable[str]): Nombres de los atributos (los de un grupo se invalidan juntos).
+        """
+        atributos = self.__dict__
+        for nombre in nombres:
+            if nombre in atributos:
+                del atributos[nombre]
+                grupo = type(self).__dict__[nombre].grupo
+                contador_perezosos.programados[grupo] += 1
+                if grupo == 'agregados_por_item':
+                    for otro in AGREGADOS_POR_ITEM:
+                        atributos.pop(otro, None)
+                    self._ordenes_agregables = None
+
+    def copiar(self) -> "Solucion":
+        """
+        Crea una copia de la solución que comparte la instancia y los objetos Order/Runner
+        (que no se modifican durante la búsqueda) y clona sólo el estado propio de la solución.
+
+        Returns:
+            Solucion: Copia independiente de la solución.
+        """
+        nueva = Solucion.__new__(Solucion)
+        for nombre, valor in self.__dict__.items():
+            if isinstance(valor, dict):
+                valor = dict(valor)
+            elif isinstance(valor, list):
+                valor = list(valor)
+            elif isinstance(valor, np.ndarray):
+                valor = valor.copy()
+            nueva.__dict__[nombre] = valor
+        if self._ordenes_agregables is not None:
+            nueva._ordenes_agregables = self._ordenes_agregables.copiar(nueva.mascara_ordenes)
+        return nueva
+
+    def __deepcopy__(self, memo):
+        """
+        Hace que copy.deepcopy use la copia estructuralmente compartida en vez de duplicar la instancia.
+        """
+        nueva = self.copiar()
+        memo[id(self)] = nueva
+        return nueva
+
+    def recalcular_agregados_por_item(self):
+        """
+        Recalcula desde cero la demanda, el stock, el stock disponible por ítem y el déficit
+        (suma y cantidad de ítems con demanda mayor al stock) de la selección actual.
+        """
+        demanda = self.instance.demanda_por_item(self.id_selected_orders).astype(np.int64)
+        stock = self.instance.stock_por_item(self.id_selected_runners).astype(np.int64)
+        disponible = stock - demanda
+        deficits = disponible[disponible < 0]
+        atributos = self.__dict__  # Se escriben en el __dict__ para no pasar por los atributos perezosos
+        atributos['vector_demanda'] = demanda  # Demanda total por ítem
+        atributos['vector_stock'] = stock  # Stock total por ítem
+        atributos['vector_disponible'] = disponible  # Stock disponible por ítem
+        atributos['deficit_total'] = -int(deficits.sum())  # Suma de unidades faltantes en los ítems con déficit
+        atributos['num_items_deficit'] = len(deficits)  # Número de ítems cuya demanda supera al stock
+        self._ordenes_agregables = None  # Se construye al pedirla en ordenes_agregables()
+
+    @property
+    def demanda_total_por_item(self) -> VistaPorItem:
+        """Demanda total por ítem como diccionario (vista sobre vector_demanda)."""
+        return VistaPorItem(self.vector_demanda)
+
+    @property
+    def stock_total_por_item(self) -> VistaPorItem:
+        """Stock total por ítem como diccionario (vista sobre vector_stock)."""
+        return VistaPorItem(self.vector_stock)
+
+    @property
+    def stock_disponible_por_item(self) -> VistaPorItem:
+        """Stock disponible por ítem como diccionario (vista sobre vector_disponible)."""
+        return VistaPorItem(self.vector_disponible)
+
+    def ordenes_agregables(self) -> OrdenesAgregables:
+        """
+        Conjunto de órdenes no seleccionadas que caben en el stock disponible. Se construye la primera vez
+        que se pide y luego apply() lo mantiene actualizado; recalcular_agregados_por_item() lo descarta.
+
+        Returns:
+            OrdenesAgregables: Estructura asociada a esta solución.
+        """
+        if self._ordenes_agregables is None:
+            self._ordenes_agregables = OrdenesAgregables(self.instance, self.vector_disponible, self.mascara_ordenes)
+        return self._ordenes_agregables
 
     def set_objective_value(self) -> float:
         """
@@ -229,23 +965,12 @@ class Solucion:
         Returns:
             bool: True si la solución es factible, False en caso contrario.
         """
-        demanda_total = {i: 0 for i in range(self.instance.num_items)}  # Inicializa demanda total por ítem
-        for order in self.selected_orders:
-            for item, quantity in order.items.items():
-                demanda_total[item] += quantity
-
-        stock_total = {i: 0 for i in range(self.instance.num_items)}  # Inicializa stock total por ítem
-        for runner in self.selected_runners:
-            for item, quantity in runner.stock.items():
-                stock_total[item] += quantity
-
-        
         # verificamos si la solucion respespeta el lb y el ub respecto a los items totales
         if self.total_units_order < self.instance.lb or self.total_units_order > self.instance.ub:
             return False
 
         # Verifica si el stock cubre la demanda en todos los ítems
-        return all(stock_total[i] >= demanda_total[i] for i in demanda_total)
+        return not (self.vector_stock < self.vector_demanda).any()
     
     def costo_infactible(self) -> float:
         """
@@ -261,14 +986,8 @@ class Solucion:
             k_2 = self.total_units_order - self.instance.ub
         else:
             k_2 = 0
-        
-        k = []  
-        for i in self.demanda_total_por_item:
-            if self.stock_total_por_item[i] < self.demanda_total_por_item[i]:
-                k_i = self.demanda_total_por_item[i] - self.stock_total_por_item[i]
-                k.append(k_i)
 
-        return k_1+k_2+sum(k)
+        return k_1+k_2+self.deficit_total
     
     def infesible_type(self) -> float:
         """
@@ -285,11 +1004,8 @@ class Solucion:
         else:
             k_2 = ""
         
-        k = []  
-        for i in self.demanda_total_por_item:
-            if self.stock_total_por_item[i] < self.demanda_total_por_item[i]:
-                k_i = 1
-                k.append(k_i)
+        # Un 1 por cada ítem cuya demanda supera al stock
+        k = [1] * int(np.count_nonzero(self.vector_stock < self.vector_demanda))
 
         return [k_1, k_2, k]
 
@@ -302,11 +1018,8 @@ class Solucion:
         """
         asignacion = {}  # Diccionario de asignación final
 
-        # Crea una copia profunda de los corredores para manipular el stock sin alterar el original
-        pasillos_seleccionados = copy.deepcopy(self.selected_runners)
-
-        # Diccionario para llevar un control del stock restante por corredor
-        stock_restante = {pasillo.index: dict(pasillo.stock) for pasillo in pasillos_seleccionados}
+        # Diccionario para llevar un control del stock restante por corredor (copias, para no alterar los corredores)
+        stock_restante = {pasillo.index: pasillo.stock for pasillo in self.selected_runners}
 
         for order in self.selected_orders:
             order_id = order.index
@@ -350,20 +1063,10 @@ class Solucion:
         Returns:
             Dict[int, int]: Diccionario con el stock total por ítem.
         """
-        stock_disponible = {i: 0 for i in range(self.instance.num_items)}
-        for runner in self.selected_runners:
-            for item, quantity in runner.stock.items():
-                stock_disponible[item] += quantity
-        
+        stock = self.instance.stock_por_item(runner.index for runner in self.selected_runners)
         # ahora restamos el stock disponible con la demanda total de las órdenes seleccionadas
-        demanda_total = {i: 0 for i in range(self.instance.num_items)}
-        for order in self.selected_orders:
-            for item, quantity in order.items.items():
-                demanda_total[item] += quantity
-        
-        for item in stock_disponible:
-            stock_disponible[item] -= demanda_total[item]
-        return stock_disponible
+        demanda = self.instance.demanda_por_item(order.index for order in self.selected_orders)
+        return dict(enumerate((stock - demanda).tolist()))
     
     def actualizar_atributos(self):
         """
@@ -371,11 +1074,244 @@ class Solucion:
         """
         self.total_units_order = sum(order.total_units for order in self.selected_orders)
         self.num_runners = len(self.selected_runners)
+        self.num_orders = len(self.selected_orders)
         self.objective_value = self.set_objective_value()
-        self.stock_disponible_por_item = self.determinar_stock_disponible_por_item()
         self.id_selected_orders = tuple(order.index for order in self.selected_orders)
         self.id_selected_runners = tuple(runner.index for runner in self.selected_runners)
-        self.is_factible = self.set_is_factible()
+        self.invalidar(PEREZOSOS)
+        self.recalcular_mascaras()
+
+    def recalcular_mascaras(self):
+        """
+        Reconstruye las máscaras booleanas de órdenes y corredores seleccionados a partir de las tuplas de ids.
+        Las máscaras permiten revisar pertenencia en O(1) y obtener los no seleccionados con ~mascara.
+        """
+        self.mascara_ordenes = np.zeros(len(self.instance.orders), dtype=bool)
+        self.mascara_ordenes[list(self.id_selected_orders)] = True
+        self.mascara_runners = np.zeros(len(self.instance.runners), dtype=bool)
+        self.mascara_runners[list(self.id_selected_runners)] = True
+        if self._ordenes_agregables is not None:
+            self._ordenes_agregables.seleccionadas = self.mascara_ordenes
+
+    def recalcular_huella(self):
+        """
+        Calcula desde cero la huella de Zobrist de la solución: XOR de las claves de las órdenes y corredores
+        seleccionados. Una vez calculada, apply() la mantiene actualizada con un XOR por orden o corredor que entra o sale.
+        """
+        self.huella = self._huella()
+
+    def huella_tras(self, movimiento: Movimiento) -> int:
+        """
+        Huella que tendría la solución después de aplicar un movimiento, sin aplicarlo.
+        """
+        huella = self.huella
+        for id_orden in movimiento.agregar_ordenes + movimiento.eliminar_ordenes:
+            huella ^= self.instance.zobrist_orders[id_orden]
+        for id_runner in movimiento.agregar_runners + movimiento.eliminar_runners:
+            huella ^= self.instance.zobrist_runners[id_runner]
+        return huella
+
+    def evaluacion(self) -> Evaluacion:
+        """Valor objetivo, costo de infactibilidad y factibilidad de la solución actual."""
+        return Evaluacion(self.objective_value, self.costo_infactible(), self.is_factible)
+
+    def evaluar(self, movimiento: Movimiento, cache: Optional[CacheEvaluaciones] = None) -> Evaluacion:
+        """
+        Evalúa la solución que resultaría de aplicar un movimiento. Con un cache, la evaluación se busca por la
+        huella de la solución resultante (p. ej. al deshacer un swap se vuelve a una huella ya vista) y sólo si
+        no está se calcula con delta() y se guarda.
+
+        Args:
+            movimiento (Movimiento): Movimiento a evaluar (mismas condiciones que en delta()).
+            cache (Optional[CacheEvaluaciones]): Cache de evaluaciones por huella.
+
+        Returns:
+            Evaluacion: Evaluación de la solución resultante.
+        """
+        if cache is not None:
+            huella = self.huella_tras(movimiento)
+            evaluacion = cache.buscar(huella)
+            if evaluacion is not None:
+                return evaluacion
+        cambio = self.delta(movimiento)
+        evaluacion = Evaluacion(self.objective_value + cambio.delta_objetivo,
+                                self.costo_infactible() + cambio.delta_costo_infactible, cambio.es_factible)
+        if cache is not None:
+            cache.guardar(huella, evaluacion)
+        return evaluacion
+
+    def ordenes_no_seleccionadas(self) -> np.ndarray:
+        """Ids de las órdenes que no están en la solución, en orden creciente."""
+        return np.flatnonzero(~self.mascara_ordenes)
+
+    def runners_no_seleccionados(self) -> np.ndarray:
+        """Ids de los corredores que no están en la solución, en orden creciente."""
+        return np.flatnonzero(~self.mascara_runners)
+
+    def _penalizacion_limites(self, unidades: int) -> int:
+        """
+        Unidades que faltan para el LB o que sobran sobre el UB con un total de unidades dado.
+        """
+        return max(0, self.instance.lb - unidades) + max(0, unidades - self.instance.ub)
+
+    def delta(self, movimiento: Movimiento) -> DeltaMovimiento:
+        """
+        Evalúa un movimiento sin modificar la solución, revisando sólo los ítems que tocan
+        las órdenes y corredores que entran o salen.
+
+        Args:
+            movimiento (Movimiento): Movimiento a evaluar. Las órdenes/corredores a agregar no deben
+                estar seleccionados y los que se eliminan deben estarlo.
+
+        Returns:
+            DeltaMovimiento: Cambio en el valor objetivo, en el costo de infactibilidad y factibilidad resultante.
+        """
+        orders = self.instance.orders
+
+        # Cambio del stock disponible en los ítems tocados
+        _, _, tocados, cambio = self._cambios_por_item(movimiento)
+        disponible = self.vector_disponible[tocados]
+        delta_deficit, delta_items_deficit = variacion_deficit(disponible, disponible + cambio)
+
+        unidades = (self.total_units_order
+                    + sum(orders[o].total_units for o in movimiento.agregar_ordenes)
+                    - sum(orders[o].total_units for o in movimiento.eliminar_ordenes))
+        num_runners = self.num_runners + len(movimiento.agregar_runners) - len(movimiento.eliminar_runners)
+        objetivo = unidades / num_runners if num_runners > 0 else 0.0
+
+        delta_costo = (delta_deficit + self._penalizacion_limites(unidades)
+                       - self._penalizacion_limites(self.total_units_order))
+        es_factible = (self.num_items_deficit + delta_items_deficit == 0
+                       and self.instance.lb <= unidades <= self.instance.ub)
+        return DeltaMovimiento(objetivo - self.objective_value, delta_costo, es_factible)
+
+    def _cambios_por_item(self, movimiento: Movimiento) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Cambios por ítem de un movimiento, tomados de las filas de las matrices de la instancia.
+
+        Returns:
+            Tuple: (ítems, cambio de demanda) y (ítems, cambio de stock), con ítems repetidos si varias órdenes o
+            corredores los tocan, y los ítems tocados sin repetir con el cambio neto de su stock disponible.
+        """
+        instance = self.instance
+        partes_demanda = [filas_concatenadas(instance.orders_matrix, ids, signo) for ids, signo in
+                          ((movimiento.agregar_ordenes, 1), (movimiento.eliminar_ordenes, -1)) if ids]
+        partes_stock = [filas_concatenadas(instance.runners_matrix, ids, signo) for ids, signo in
+                        ((movimiento.agregar_runners, 1), (movimiento.eliminar_runners, -1)) if ids]
+        demanda = _unir(partes_demanda)
+        stock = _unir(partes_stock)
+        partes = partes_demanda + partes_stock
+        if len(partes) == 1 and (len(movimiento.agregar_ordenes) + len(movimiento.eliminar_ordenes)
+                                 + len(movimiento.agregar_runners) + len(movimiento.eliminar_runners)) == 1:
+            # Una sola orden o corredor: sus ítems no se repiten
+            items, cantidades = partes[0]
+            return demanda, stock, items, (cantidades if partes_stock else -cantidades)
+        items = np.concatenate([demanda[0], stock[0]])
+        cantidades = np.concatenate([-demanda[1], stock[1]])
+        if len(items) <= MAX_ITEMS_PYTHON:
+            # Con pocos ítems, acumular en un diccionario es más rápido que np.unique
+            cambio_por_item = {}
+            for item, cantidad in zip(items.tolist(), cantidades.tolist()):
+                cambio_por_item[item] = cambio_por_item.get(item, 0) + cantidad
+            return (demanda, stock, np.fromiter(cambio_por_item, dtype=np.int64, count=len(cambio_por_item)),
+                    np.fromiter(cambio_por_item.values(), dtype=np.int64, count=len(cambio_por_item)))
+        tocados, posicion = np.unique(items, return_inverse=True)
+        cambio = np.zeros(len(tocados), dtype=np.int64)
+        np.add.at(cambio, posicion, cantidades)
+        return demanda, stock, tocados, cambio
+
+    def delta_add_order(self, id_orden: int) -> DeltaMovimiento:
+        """Evalúa agregar una orden no seleccionada."""
+        return self.delta(Movimiento(agregar_ordenes=(id_orden,)))
+
+    def delta_remove_order(self, id_orden: int) -> DeltaMovimiento:
+        """Evalúa eliminar una orden seleccionada."""
+        return self.delta(Movimiento(eliminar_ordenes=(id_orden,)))
+
+    def delta_add_runner(self, id_runner: int) -> DeltaMovimiento:
+        """Evalúa agregar un corredor no seleccionado."""
+        return self.delta(Movimiento(agregar_runners=(id_runner,)))
+
+    def delta_remove_runner(self, id_runner: int) -> DeltaMovimiento:
+        """Evalúa eliminar un corredor seleccionado."""
+        return self.delta(Movimiento(eliminar_runners=(id_runner,)))
+
+    def delta_swap(self, ordenes_salen=(), ordenes_entran=(), runners_salen=(), runners_entran=()) -> DeltaMovimiento:
+        """Evalúa intercambiar órdenes y/o corredores seleccionados por otros no seleccionados."""
+        return self.delta(Movimiento(agregar_ordenes=tuple(ordenes_entran), eliminar_ordenes=tuple(ordenes_salen),
+                                     agregar_runners=tuple(runners_entran), eliminar_runners=tuple(runners_salen)))
+
+    def apply(self, movimiento: Movimiento):
+        """
+        Aplica un movimiento sobre la solución, actualizando en el lugar los agregados por ítem
+        sólo en los ítems tocados. Las órdenes y corredores agregados quedan al final de la selección.
+
+        Args:
+            movimiento (Movimiento): Movimiento a aplicar (mismas condiciones que en delta()).
+        """
+        orders = self.instance.orders
+        runners = self.instance.runners
+        agregables = self._ordenes_agregables
+        atributos = self.__dict__
+        # Los atributos perezosos que aún no se calculan no se actualizan: se calcularán con la selección nueva
+        con_agregados = 'vector_disponible' in atributos
+
+        if con_agregados:
+            (items_demanda, cambio_demanda), (items_stock, cambio_stock), tocados, cambio = self._cambios_por_item(movimiento)
+            anterior = self.vector_disponible[tocados]
+            nuevo = anterior + cambio
+            if len(items_demanda):
+                np.add.at(self.vector_demanda, items_demanda, cambio_demanda)
+            if len(items_stock):
+                np.add.at(self.vector_stock, items_stock, cambio_stock)
+            self.vector_disponible[tocados] = nuevo
+            delta_deficit, delta_items_deficit = variacion_deficit(anterior, nuevo)
+            self.deficit_total += delta_deficit
+            self.num_items_deficit += delta_items_deficit
+
+        for ids, mascara, valor in ((movimiento.agregar_ordenes, self.mascara_ordenes, True),
+                                    (movimiento.eliminar_ordenes, self.mascara_ordenes, False),
+                                    (movimiento.agregar_runners, self.mascara_runners, True),
+                                    (movimiento.eliminar_runners, self.mascara_runners, False)):
+            if ids:
+                mascara[list(ids)] = valor
+        if agregables is not None:
+            for item, antes, despues in zip(tocados.tolist(), anterior.tolist(), nuevo.tolist()):
+                agregables.actualizar_item(item, antes, despues)
+            for id_orden in movimiento.eliminar_ordenes:
+                agregables.liberar(id_orden)
+
+        for id_orden in movimiento.agregar_ordenes:
+            self.total_units_order += orders[id_orden].total_units
+        for id_orden in movimiento.eliminar_ordenes:
+            self.total_units_order -= orders[id_orden].total_units
+        if 'huella' in atributos:
+            self.huella = self.huella_tras(movimiento)
+        if 'total_units_runner' in atributos:
+            self.total_units_runner += (sum(runners[a].total_units for a in movimiento.agregar_runners)
+                                        - sum(runners[a].total_units for a in movimiento.eliminar_runners))
+        if movimiento.agregar_ordenes or movimiento.eliminar_ordenes:
+            self.invalidar(('diversity_orders',))
+        if movimiento.agregar_runners or movimiento.eliminar_runners:
+            self.invalidar(('diversity_runners',))
+
+        if movimiento.agregar_ordenes or movimiento.eliminar_ordenes:
+            eliminar = set(movimiento.eliminar_ordenes)
+            self.id_selected_orders = tuple(o for o in self.id_selected_orders if o not in eliminar) + tuple(movimiento.agregar_ordenes)
+            self.selected_orders = tuple(orders[o] for o in self.id_selected_orders)
+        if movimiento.agregar_runners or movimiento.eliminar_runners:
+            eliminar = set(movimiento.eliminar_runners)
+            self.id_selected_runners = tuple(a for a in self.id_selected_runners if a not in eliminar) + tuple(movimiento.agregar_runners)
+            self.selected_runners = tuple(runners[a] for a in self.id_selected_runners)
+
+        self.num_orders = len(self.id_selected_orders)
+        self.num_runners = len(self.id_selected_runners)
+        self.objective_value = self.set_objective_value()
+        if con_agregados:
+            self.is_factible = (self.num_items_deficit == 0
+                                and self.instance.lb <= self.total_units_order <= self.instance.ub)
+        else:
+            self.invalidar(('is_factible',))
 
     def __str__(self):
         """
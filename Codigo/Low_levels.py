@@ -1,11 +1,16 @@
 import numpy as np
-from Instance import Instance, Solucion
+from Instance import Instance, Solucion, Movimiento
 import copy
 import random
+from typing import List, Optional
 
 
 class LowLevels:
     '''Clase que representa los niveles bajos del algoritmo de optimización.'''
+    # True si implementacion no usa azar: la misma solución de entrada da siempre la misma salida
+    # (la hiper heurística puede reutilizar sus resultados, ver CachePrefijos)
+    determinista = False
+
     def __init__(self, id: int, nombre: str):
         self.id = id
         self.nombre = nombre
@@ -18,60 +23,30 @@ class LowLevels:
 
 class LowLevel1_agregacion(LowLevels):
     '''Implementación del primer nivel bajo del algoritmo de optimización que agrega la orden con más productos.'''
+    determinista = True
+
     def __init__(self, id: int, nombre: str):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
         '''Implementación del primer nivel bajo del algoritmo de optimización el cual consiste en determinar todas las ordenes que se pueden agregar
         a la solución utilizando el stock restante, luego se elije la que tiene más items y se agrega a la selección.'''
-        # Aquí se implementa la lógica específica del primer nivel bajo
-        # Obtenemos el stock disponible por ítem
-        # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
-
-        id_ordenes_seleccionadas = list(solucion.id_selected_orders)
+        # Las órdenes que caben en el stock restante se mantienen incrementalmente en la solución,
+        # ordenadas por cantidad de ítems, así que basta consultar la mejor
+        id_orden = solucion_antigua.ordenes_agregables().mejor()
 
-        stock_disponible = solucion.stock_disponible_por_item
-        # Creamos una lista para almacenar las ordenes que no están en la solución actual
-        ordenes_no_seleccionadas = []
-        # Iteramos sobre las órdenes de la solución
-        for id_orden in solucion.instance.id_orders:
-            # Si la orden no está en la solución, la agregamos a la lista de órdenes no seleccionadas
-            if id_orden not in id_ordenes_seleccionadas:
-                ordenes_no_seleccionadas.append(solucion.instance.orders[id_orden])
-
-        # Si no hay órdenes no seleccionadas, retornamos la solución antigua
-        if not ordenes_no_seleccionadas:
-            #print("No hay órdenes no seleccionadas para agregar a la solución.")
-            return solucion_antigua
-        
-        # ahora determinamos si de las ordenes no seleccionadas, hay alguna que se pueda agregar a la solución con el stock disponible
-        ordenes_candidatas = []
-        for orden in ordenes_no_seleccionadas:
-            # Verificamos si la orden se puede agregar con el stock disponible
-            if all(stock_disponible[item] >= cantidad for item, cantidad in orden.items.items()):
-                ordenes_candidatas.append(orden)
-        
-        # ahora, si hay órdenes candidatas, seleccionamos la que tiene más cantidad de todos los ítems
-        if ordenes_candidatas:
-            # Seleccionamos la orden con más ítems
-            orden_seleccionada = max(ordenes_candidatas, key=lambda o: sum(o.items.values()))
-            # Agregamos la orden seleccionada a la solución siempre y cuando no se superen los limites de productos posibles de llevar Upper Bound
-            if solucion.total_units_order + orden_seleccionada.total_units > solucion.instance.ub:
-                return solucion_antigua
-            
-            id_ordenes_seleccionadas.append(orden_seleccionada.index)
-        else:
+        # Si no hay órdenes candidatas, retornamos la solución antigua
+        if id_orden is None:
             #print("No hay órdenes candidatas que se puedan agregar a la solución con el stock disponible.")
             return solucion_antigua
-        
-        # si se modifica se actualiza toda la solución
 
-        solucion.id_selected_orders = tuple(id_ordenes_seleccionadas)
-        # agregamos la orden seleccionada a la selected orders de la solución
-        solucion.selected_orders = tuple(solucion.instance.orders[id_orden] for id_orden in id_ordenes_seleccionadas)
+        # Agregamos la orden seleccionada a la solución siempre y cuando no se superen los limites de productos posibles de llevar Upper Bound
+        if solucion_antigua.total_units_order + solucion_antigua.instance.orders[id_orden].total_units > solucion_antigua.instance.ub:
+            return solucion_antigua
 
-        solucion.actualizar_atributos()
+        # creamos una copia de la solución para no modificar la original y agregamos la orden
+        solucion = solucion_antigua.copiar()
+        solucion.apply(Movimiento(agregar_ordenes=(id_orden,)))
 
         # Retornamos la solución modificada
         return solucion
@@ -79,35 +54,28 @@ class LowLevel1_agregacion(LowLevels):
 
 class LowLevel2_agregacion(LowLevels):
     '''Implementacion de low level que agrega a la solución la orden con menos productos.'''
+    determinista = True
+
     def __init__(self, id: int, nombre: str):
         super().__init__(id, nombre)
     
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
         '''Implementación del segundo nivel bajo del algoritmo de optimización que consiste en agregar la orden con menos productos a la solución, independientemente de la factibilidad.'''
         # Aquí se implementa la lógica específica del segundo nivel bajo
-        # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
-        id_ordenes_seleccionadas = list(solucion.id_selected_orders)
-        # Obtenemos las órdenes no seleccionadas
-        ordenes_no_seleccionadas = []
-        for id_orden in solucion.instance.id_orders:
-            if id_orden not in id_ordenes_seleccionadas:
-                ordenes_no_seleccionadas.append(solucion.instance.orders[id_orden])
-        
+        # Recorremos las órdenes de menor a mayor cantidad de productos (orden precalculado en la instancia)
+        # y nos quedamos con la primera que no está seleccionada
+        instance = solucion_antigua.instance
+        no_seleccionadas = instance.orders_por_unidades[~solucion_antigua.mascara_ordenes[instance.orders_por_unidades]]
+
         # elegimos la orden con menos productos
-        if not ordenes_no_seleccionadas:
+        if len(no_seleccionadas) == 0:
             #print("No hay órdenes no seleccionadas para agregar a la solución.")
             return solucion_antigua
-        
-        ordenes_no_seleccionadas.sort(key=lambda o: o.total_units)
-        orden_seleccionada = ordenes_no_seleccionadas[0]
-        # Agregamos la orden seleccionada a la solución
-        id_ordenes_seleccionadas.append(orden_seleccionada.index)
-        solucion.id_selected_orders = tuple(id_ordenes_seleccionadas)
-        # agregamos la orden seleccionada a la selected orders de la solución
-        solucion.selected_orders = tuple(solucion.instance.orders[id_orden] for id_orden in id_ordenes_seleccionadas)
-        # actualizamos los atributos de la solución
-        solucion.actualizar_atributos()
+
+        # creamos una copia de la solución para no modificar la original
+        solucion = solucion_antigua.copiar()
+        # Agregamos la orden seleccionada a la solución y actualizamos sus atributos
+        solucion.apply(Movimiento(agregar_ordenes=(int(no_seleccionadas[0]),)))
         # Retornamos la solución modificada
         return solucion
     
@@ -117,40 +85,31 @@ class LowLevel3_agregacion(LowLevels):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
-        id_ordenes_seleccionadas = list(solucion.id_selected_orders)
-
-        # Obtener órdenes fuera de la solución
-        ordenes_fuera = [
-            orden for orden in solucion.instance.orders
-            if orden.index not in id_ordenes_seleccionadas
-        ]
+        # Obtener órdenes fuera de la solución a partir de la máscara de seleccionadas
+        ordenes_fuera = solucion_antigua.ordenes_no_seleccionadas()
 
-        if not ordenes_fuera:
+        if len(ordenes_fuera) == 0:
             return solucion_antigua
 
+        solucion = solucion_antigua.copiar()
         n = len(ordenes_fuera)
         cantidad_agregar = random.randint(1, min(10, n))
 
-        # Mapeo de pesos por índice 
-        r_i = {orden.index: len(orden.items) / n for orden in ordenes_fuera}
+        # Pesos por índice: cantidad de ítems distintos de cada orden (largo de su fila en la matriz)
+        items_por_orden = np.diff(solucion.instance.orders_matrix.indptr)
+        pesos = (items_por_orden[ordenes_fuera] / n).tolist()
 
         # Selección aleatoria ponderada
         ordenes_idx_seleccionadas = random.choices(
-            population=list(r_i.keys()),
-            weights=list(r_i.values()),
+            population=ordenes_fuera.tolist(),
+            weights=pesos,
             k=cantidad_agregar
         )
 
-        for idx in ordenes_idx_seleccionadas:
-            if idx not in id_ordenes_seleccionadas:
-                id_ordenes_seleccionadas.append(idx)
+        # Las órdenes elegidas están todas fuera de la solución; sólo se quitan las repetidas
+        nuevas_ordenes = tuple(dict.fromkeys(ordenes_idx_seleccionadas))
 
-        solucion.id_selected_orders = tuple(id_ordenes_seleccionadas)
-        solucion.selected_orders = tuple(
-            solucion.instance.orders[id_orden] for id_orden in id_ordenes_seleccionadas
-        )
-        solucion.actualizar_atributos()
+        solucion.apply(Movimiento(agregar_ordenes=nuevas_ordenes))
         return solucion
     
 class LowLevel4_agregacion(LowLevels):
@@ -159,29 +118,21 @@ class LowLevel4_agregacion(LowLevels):
         super().__init__(id, nombre)
         
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
-        id_runners_seleccionados = list(solucion.id_selected_runners)
-        
-        # Obtenemos los runners no seleccionadas
-        runners_no_seleccionados = []
-        for id_runner in solucion.instance.id_runners:
-            if id_runner not in id_runners_seleccionados:
-                runners_no_seleccionados.append(solucion.instance.runners[id_runner])
-        
-        n=min(10, len(runners_no_seleccionados))
+        # Obtenemos los runners no seleccionados
+        runners_no_seleccionados = solucion_antigua.runners_no_seleccionados()
+
+        # Si no quedan pasillos fuera de la solución, retornamos la solución antigua
         n = len(runners_no_seleccionados)
+        if n == 0:
+            return solucion_antigua
+
+        solucion = solucion_antigua.copiar()
         cantidad_agregar = random.randint(1, min(10, n))
-        runners_no_seleccionados.sort(key=lambda r: r.total_units, reverse=True)   
-        runners_seleccionados = runners_no_seleccionados[0:cantidad_agregar]
-        # Agregamos la orden seleccionada a la solución
-        for runner in runners_seleccionados:
-            id_runners_seleccionados.append(runner.index)
-            
-        solucion.id_selected_runners = tuple(id_runners_seleccionados)
-        # agregamos la orden seleccionada a la selected orders de la solución
-        solucion.selected_runners = tuple(solucion.instance.runners[id_runner] for id_runner in id_runners_seleccionados)
-        # actualizamos los atributos de la solución
-        solucion.actualizar_atributos()
+        # Ordenamos de mayor a menor cantidad de productos (estable, para mantener el orden por índice en los empates)
+        orden = np.argsort(-solucion.instance.runners_units[runners_no_seleccionados], kind='stable')
+        runners_seleccionados = runners_no_seleccionados[orden[:cantidad_agregar]]
+        # Agregamos los pasillos seleccionados a la solución y actualizamos sus atributos
+        solucion.apply(Movimiento(agregar_runners=tuple(runners_seleccionados.tolist())))
         # Retornamos la solución modificada
         return solucion
     
@@ -191,33 +142,23 @@ class LowLevel5_agregacion(LowLevels):
         super().__init__(id, nombre)
     
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        '''Implementación del segundo nivel bajo del algoritmo de optimización que consiste en agregar la orden con menos productos a la solución, independientemente de la factibilidad.'''
-        # Aquí se implementa la lógica específica del segundo nivel bajo
-        # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
-        id_ordenes_seleccionadas = list(solucion.id_selected_orders)
+        '''Agrega entre 1 y 10 (al azar) de las órdenes no seleccionadas con más productos, independientemente de la factibilidad.'''
         # Obtenemos las órdenes no seleccionadas
-        ordenes_no_seleccionadas = []
-        for id_orden in solucion.instance.id_orders:
-            if id_orden not in id_ordenes_seleccionadas:
-                ordenes_no_seleccionadas.append(solucion.instance.orders[id_orden])
-        
-        # elegimos la orden con menos productos
-        if not ordenes_no_seleccionadas:
+        ordenes_no_seleccionadas = solucion_antigua.ordenes_no_seleccionadas()
+
+        if len(ordenes_no_seleccionadas) == 0:
             #print("No hay órdenes no seleccionadas para agregar a la solución.")
             return solucion_antigua
-        
+
+        # creamos una copia de la solución para no modificar la original
+        solucion = solucion_antigua.copiar()
         n = len(ordenes_no_seleccionadas)
         cantidad_agregar = random.randint(1, min(10, n))
-        ordenes_no_seleccionadas.sort(key=lambda o: o.total_units, reverse=True)
-        orden_seleccionada = ordenes_no_seleccionadas[0:cantidad_agregar]
-        # Agregamos la orden seleccionada a la solución
-        id_ordenes_seleccionadas.append(orden_seleccionada.index)
-        solucion.id_selected_orders = tuple(id_ordenes_seleccionadas)
-        # agregamos la orden seleccionada a la selected orders de la solución
-        solucion.selected_orders = tuple(solucion.instance.orders[id_orden] for id_orden in id_ordenes_seleccionadas)
-        # actualizamos los atributos de la solución
-        solucion.actualizar_atributos()
+        # Ordenamos de mayor a menor cantidad de productos (estable, para mantener el orden por índice en los empates)
+        orden = np.argsort(-solucion.instance.orders_units[ordenes_no_seleccionadas], kind='stable')
+        ordenes_agregadas = ordenes_no_seleccionadas[orden[:cantidad_agregar]]
+        # Agregamos las órdenes seleccionadas a la solución
+        solucion.apply(Movimiento(agregar_ordenes=tuple(ordenes_agregadas.tolist())))
         # Retornamos la solución modificada
         return solucion
         
@@ -226,13 +167,15 @@ class LowLevel5_agregacion(LowLevels):
 
 class LowLevel1_eliminacion(LowLevels):
     '''Implementación del segundo nivel bajo del algoritmo de optimización que elimina el pasillo con menos productos.'''
+    determinista = True
+
     def __init__(self, id: int, nombre: str):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
         '''Eliminamos el pasillo seleccionado con menos productos de la solución.'''
         # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         # Aquí se implementa la lógica específica del segundo nivel bajo
         pasillos_seleccionados = list(solucion_antigua.id_selected_runners)
@@ -248,12 +191,7 @@ class LowLevel1_eliminacion(LowLevels):
         pasillo_seleccionado = pasillos_seleccionados[len(pasillos_seleccionados) - 1]  # el último es el que tiene menos productos
 
         # eliminamos el pasillo seleccionado de la solución
-        pasillos_seleccionados.remove(pasillo_seleccionado)
-
-        solucion.id_selected_runners = tuple(pasillos_seleccionados)
-        solucion.selected_runners = tuple(solucion.instance.runners[id_pasillo] for id_pasillo in pasillos_seleccionados)
-
-        solucion.actualizar_atributos()
+        solucion.apply(Movimiento(eliminar_runners=(pasillo_seleccionado,)))
 
         return solucion
 
@@ -265,7 +203,7 @@ class LowLevel2_eliminacion(LowLevels):
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
         '''Eliminamos un pasillo seleccionado al azar de la solución.'''
         # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         # Aquí se implementa la lógica específica del tercer nivel bajo
         pasillos_seleccionados = list(solucion.id_selected_runners)
@@ -277,12 +215,7 @@ class LowLevel2_eliminacion(LowLevels):
         # eliminamos un pasillo al azar
         id_pasillo_eliminado = np.random.choice(pasillos_seleccionados)
         #print(id_pasillo_eliminado)
-        pasillos_seleccionados.remove(id_pasillo_eliminado)
-
-        solucion.id_selected_runners = tuple(pasillos_seleccionados)
-        solucion.selected_runners = tuple(solucion.instance.runners[id_pasillo] for id_pasillo in pasillos_seleccionados)
-
-        solucion.actualizar_atributos()
+        solucion.apply(Movimiento(eliminar_runners=(int(id_pasillo_eliminado),)))
 
         return solucion
     
@@ -298,17 +231,11 @@ class LowLevel1_swap(LowLevels):
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
         '''Eliminamos la orden con menos productos y agregamos una orden con más productos no seleccionada.'''
         # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         # Aquí se implementa la lógica específica del cuarto nivel bajo
-        id_ordenes_seleccionadas = list(solucion.id_selected_orders)
-
         # ahora buscamos una orden no seleccionada que se pueda agregar a la solución al azar
-        # creamos una lista de órdenes no seleccionadas
-        ordenes_no_seleccionadas = []
-        for id_orden in solucion.instance.id_orders:
-            if id_orden not in id_ordenes_seleccionadas:
-                ordenes_no_seleccionadas.append(solucion.instance.orders[id_orden])
+        ordenes_no_seleccionadas = solucion.ordenes_no_seleccionadas()
 
         # elejimos la orden con menos productos
         ordenes_seleccionadas = list(solucion.selected_orders)
@@ -318,21 +245,16 @@ class LowLevel1_swap(LowLevels):
             return solucion_antigua
         
         ordenes_seleccionadas.sort(key=lambda o: o.total_units)
-        orden_seleccionada = ordenes_seleccionadas[0]
-        # eliminamos la orden seleccionada de la solución
-        id_ordenes_seleccionadas.remove(orden_seleccionada.index)
+        orden_eliminada = ordenes_seleccionadas[0]
 
         # elejimos una orden no seleccionada al azar
-        if ordenes_no_seleccionadas:
-            orden_seleccionada = np.random.choice(ordenes_no_seleccionadas)
+        if len(ordenes_no_seleccionadas) == 0:
+            return solucion
 
-        # agregamos la orden seleccionada a la solución
-        id_ordenes_seleccionadas.append(orden_seleccionada.index)
-        solucion.id_selected_orders = tuple(id_ordenes_seleccionadas)
-        solucion.selected_orders = tuple(solucion.instance.orders[id_orden] for id_orden in id_ordenes_seleccionadas)
+        id_orden_agregada = int(np.random.choice(ordenes_no_seleccionadas))
 
-        # actualizamos los atributos de la solución
-        solucion.actualizar_atributos()
+        # intercambiamos las órdenes y actualizamos los atributos de la solución
+        solucion.apply(Movimiento(agregar_ordenes=(id_orden_agregada,), eliminar_ordenes=(orden_eliminada.index,)))
 
         # retornamos la solución modificada
         return solucion
@@ -343,38 +265,35 @@ class LowLevel2_swap(LowLevels):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
-        A_s = list(solucion.id_selected_runners)
-        A_sC = [a for a in solucion.instance.id_runners if a not in A_s]
+        A_s = list(solucion_antigua.id_selected_runners)
+        A_sC = solucion_antigua.runners_no_seleccionados()
 
-        if not A_sC or len(A_s) <= 1:
+        if len(A_sC) == 0 or len(A_s) <= 1:
             return solucion_antigua
 
-        total_fuera = sum(sum(solucion.instance.runners[a].stock.values()) for a in A_sC)
+        unidades = solucion_antigua.instance.runners_units
+        total_fuera = int(unidades[A_sC].sum())
         if total_fuera == 0:
             return solucion_antigua
 
-        probabilidades_agregar = [sum(solucion.instance.runners[a].stock.values()) / total_fuera for a in A_sC]
+        probabilidades_agregar = unidades[A_sC] / total_fuera
         a_agregado = np.random.choice(A_sC, p=probabilidades_agregar)
-        A_s_nuevo = A_s + [a_agregado]
 
         A_s_filtrado = [a for a in A_s if a != a_agregado]
         if not A_s_filtrado:
             return solucion_antigua
 
-        total_dentro = sum(sum(solucion.instance.runners[a].stock.values()) for a in A_s_filtrado)
+        total_dentro = int(unidades[A_s_filtrado].sum())
         if total_dentro == 0:
             return solucion_antigua
 
-        probabilidades_eliminar = [1 - sum(solucion.instance.runners[a].stock.values()) / total_dentro for a in A_s_filtrado]
+        solucion = solucion_antigua.copiar()
+        probabilidades_eliminar = [1 - u / total_dentro for u in unidades[A_s_filtrado].tolist()]
         suma_probs = sum(probabilidades_eliminar)
         probabilidades_eliminar = [p / suma_probs for p in probabilidades_eliminar]
         a_eliminado = np.random.choice(A_s_filtrado, p=probabilidades_eliminar)
 
-        A_final = [a for a in A_s_nuevo if a != a_eliminado]
-        solucion.id_selected_runners = tuple(A_final)
-        solucion.selected_runners = tuple(solucion.instance.runners[a] for a in A_final)
-        solucion.actualizar_atributos()
+        solucion.apply(Movimiento(agregar_runners=(int(a_agregado),), eliminar_runners=(int(a_eliminado),)))
         return solucion
 
 
@@ -384,38 +303,35 @@ class LowLevel3_swap(LowLevels):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
-        O_s = list(solucion.id_selected_orders)
-        O_sC = [o for o in solucion.instance.id_orders if o not in O_s]
+        O_s = list(solucion_antigua.id_selected_orders)
+        O_sC = solucion_antigua.ordenes_no_seleccionadas()
 
-        if not O_sC or len(O_s) <= 1:
+        if len(O_sC) == 0 or len(O_s) <= 1:
             return solucion_antigua
 
-        total_fuera = sum(solucion.instance.orders[o].total_units for o in O_sC)
+        unidades = solucion_antigua.instance.orders_units
+        total_fuera = int(unidades[O_sC].sum())
         if total_fuera == 0:
             return solucion_antigua
 
-        probabilidades_agregar = [solucion.instance.orders[o].total_units / total_fuera for o in O_sC]
+        probabilidades_agregar = unidades[O_sC] / total_fuera
         o_agregado = np.random.choice(O_sC, p=probabilidades_agregar)
-        O_s_nuevo = O_s + [o_agregado]
 
         O_s_filtrado = [o for o in O_s if o != o_agregado]
         if not O_s_filtrado:
             return solucion_antigua
 
-        total_dentro = sum(solucion.instance.orders[o].total_units for o in O_s_filtrado)
+        total_dentro = int(unidades[O_s_filtrado].sum())
         if total_dentro == 0:
             return solucion_antigua
 
-        probabilidades_eliminar = [1 - solucion.instance.orders[o].total_units / total_dentro for o in O_s_filtrado]
+        solucion = solucion_antigua.copiar()
+        probabilidades_eliminar = [1 - u / total_dentro for u in unidades[O_s_filtrado].tolist()]
         suma_probs = sum(probabilidades_eliminar)
         probabilidades_eliminar = [p / suma_probs for p in probabilidades_eliminar]
         o_eliminado = np.random.choice(O_s_filtrado, p=probabilidades_eliminar)
 
-        O_final = [o for o in O_s_nuevo if o != o_eliminado]
-        solucion.id_selected_orders = tuple(O_final)
-        solucion.selected_orders = tuple(solucion.instance.orders[o] for o in O_final)
-        solucion.actualizar_atributos()
+        solucion.apply(Movimiento(agregar_ordenes=(int(o_agregado),), eliminar_ordenes=(int(o_eliminado),)))
         return solucion
     
 
@@ -423,30 +339,28 @@ class LowLevel3_swap(LowLevels):
 
 class LowLevel1_factibilizadora(LowLevels):
     '''Revisa si existe infactibilidad en UB y la factibiliza eliminando órdenes hasta entrar en el UB de menor a mayor cantidad de productos'''
+    determinista = True
+
     def __init__(self, id: int, nombre: str):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         if solucion.total_units_order > solucion.instance.ub:
             # Ordena las órdenes seleccionadas de menor a mayor en unidades
             ordenes_ordenadas = sorted(solucion.selected_orders, key=lambda o: o.total_units)
 
             unidades_actuales = solucion.total_units_order
-            nuevas_ordenes = list(solucion.selected_orders)
-            nuevas_ids = list(solucion.id_selected_orders)
+            ids_eliminadas = []
 
             for orden in ordenes_ordenadas:
                 if unidades_actuales <= solucion.instance.ub:
                     break
                 unidades_actuales -= orden.total_units
-                nuevas_ordenes.remove(orden)
-                nuevas_ids.remove(orden.index)
+                ids_eliminadas.append(orden.index)
 
-            solucion.selected_orders = tuple(nuevas_ordenes)
-            solucion.id_selected_orders = tuple(nuevas_ids)
-            solucion.actualizar_atributos()
+            solucion.apply(Movimiento(eliminar_ordenes=tuple(ids_eliminadas)))
 
             return solucion
         
@@ -455,25 +369,23 @@ class LowLevel1_factibilizadora(LowLevels):
     
 class LowLevel2_factibilizadora(LowLevels):
     '''Revisa si existe infactibilidad en LB y la factibiliza agregando órdenes hasta cumplir el LB de menor a mayor cantidad de productos.'''
+    determinista = True
+
     def __init__(self, id: int, nombre: str):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         if solucion.total_units_order < solucion.instance.lb:
             unidades_actuales = solucion.total_units_order
-            nuevas_ordenes = list(solucion.selected_orders)
-            nuevas_ids = list(solucion.id_selected_orders)
-
-            # Obtener las órdenes fuera de la solución
-            ordenes_fuera = [
-                orden for orden in solucion.instance.orders
-                if orden.index not in solucion.id_selected_orders
-            ]
+            nuevas_ids = []
 
-            # Ordenar por unidades de menor a mayor para agregar "barato"
-            ordenes_ordenadas = sorted(ordenes_fuera, key=lambda o: o.total_units)
+            # Órdenes fuera de la solución, de menor a mayor en unidades para agregar "barato"
+            # (orden precalculado en la instancia, filtrado con la máscara de seleccionadas)
+            instance = solucion.instance
+            ids_ordenadas = instance.orders_por_unidades[~solucion.mascara_ordenes[instance.orders_por_unidades]]
+            ordenes_ordenadas = [instance.orders[o] for o in ids_ordenadas.tolist()]
 
             for orden in ordenes_ordenadas:
                 if unidades_actuales >= solucion.instance.lb:
@@ -481,13 +393,10 @@ class LowLevel2_factibilizadora(LowLevels):
                 if unidades_actuales + orden.total_units > solucion.instance.ub:
                     continue  # Evita pasarse del límite superior
 
-                nuevas_ordenes.append(orden)
                 nuevas_ids.append(orden.index)
                 unidades_actuales += orden.total_units
 
-            solucion.selected_orders = tuple(nuevas_ordenes)
-            solucion.id_selected_orders = tuple(nuevas_ids)
-            solucion.actualizar_atributos()
+            solucion.apply(Movimiento(agregar_ordenes=tuple(nuevas_ids)))
 
             return solucion
         else:
@@ -496,43 +405,56 @@ class LowLevel2_factibilizadora(LowLevels):
 
 class LowLevel3_factibilizadora(LowLevels):
     '''Revisa si existe infactibilidad en las consistencias y agrega más pasillos con ese ítem'''
+    determinista = True
+
     def __init__(self, id: int, nombre: str):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
         
-        if len(solucion.infesible_type()[2]) == 0:
+        # Primer ítem cuya demanda supera al stock
+        items_deficit = np.flatnonzero(solucion.vector_disponible < 0)
+        if len(items_deficit) == 0:
             return solucion
+        item = int(items_deficit[0])
+        faltante_item_i = -int(solucion.vector_disponible[item])
         
-        for i in solucion.demanda_total_por_item:
-            if solucion.demanda_total_por_item[i] > solucion.stock_total_por_item[i]:
-                item = i
-                break
-        nuevos_runners = list(solucion.selected_runners)
-        nuevas_ids = list(solucion.id_selected_runners)
-        
-        faltante_item_i = solucion.demanda_total_por_item[item] - solucion.stock_total_por_item[item]
-        
-        #recoge todos los runners fuera con el ítem i
-        runners_fuera_item = [runner for runner in solucion.instance.runners
-                         if runner.index not in solucion.id_selected_runners
-                         and item in runner.stock.keys()]
-        
+        #recoge todos los runners fuera con el ítem i, usando el índice invertido del ítem
+        ids_con_item, stock_con_item = solucion.instance.runners_con_item(item)
+        fuera = ~solucion.mascara_runners[ids_con_item]
+        stock_item = dict(zip(ids_con_item[fuera].tolist(), stock_con_item[fuera].tolist()))  # Stock del ítem i por runner
+        runners_fuera_item = [solucion.instance.runners[a] for a in stock_item]
 
         # Ordenar por unidades de mayor a menor para agregar runners
         runners_ordenados = sorted(runners_fuera_item, key=lambda r: r.total_units, reverse=True)
 
+        nuevas_ids = []
         for runner in runners_ordenados:
-            if solucion.stock_total_por_item[item] >= solucion.demanda_total_por_item[item]:
+            if faltante_item_i <= 0:
                 break
 
-            nuevos_runners.append(runner)
             nuevas_ids.append(runner.index)
-            unidades_actuales += runner.total_units
+            faltante_item_i -= stock_item[runner.index]
+
+        solucion.apply(Movimiento(agregar_runners=tuple(nuevas_ids)))
 
-        solucion.selected_runners = tuple(nuevos_runners)
-        solucion.id_selected_orders = tuple(nuevas_ids)
-        solucion.actualizar_atributos()
+        return solucion
 
-        return solucion
\ No newline at end of file
+def instanciar_low_levels(nombres: Optional[List[str]] = None) -> List[LowLevels]:
+    '''Instancia las low levels de este módulo, con id igual a su posición en la lista.
+
+    Args:
+        nombres (Optional[List[str]]): Nombres de las clases a instanciar, en ese orden. Si es None se usan todas, en el orden en que están definidas.
+
+    Returns:
+        List[LowLevels]: Low levels listas para la hiper heurística.
+    '''
+    clases = {nombre: obj for nombre, obj in globals().items()
+              if isinstance(obj, type) and issubclass(obj, LowLevels) and obj is not LowLevels}
+    if nombres is None:
+        nombres = list(clases)
+    desconocidas = [nombre for nombre in nombres if nombre not in clases]
+    if desconocidas:
+        raise ValueError(f"Low levels desconocidas: {desconocidas}")
+    return [clases[nombre](id=i, nombre=nombre) for i, nombre in enumerate(nombres)]
@@ -26,7 +26,7 @@ class LowLevel1_agregacion(LowLevels):
         Algoritmo que agrega n ordenes a la solución actual.
         '''
         # Copia de la solución actual
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
         
         # Seleccionamos el 10% del UB como parámetro para agregar órdenes
         n = 0.1*solucion.instance.ub
@@ -76,7 +76,7 @@ class LowLevel2_agregacion(LowLevels):
         Algoritmo que agrega n pasillos a la solución actual.
         '''
         # Copia de la solución actual
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
         
         # Seleccionamos el 5% del total del pasillos en la instancia
         pasillos = solucion.instance.runners
@@ -127,7 +127,7 @@ class LowLevel1_eliminacion(LowLevels):
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
         '''Eliminamos el pasillo seleccionado con menos productos de la solución.'''
         # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         # Aquí se implementa la lógica específica del segundo nivel bajo
         pasillos_seleccionados = list(solucion_antigua.id_selected_runners)
@@ -160,7 +160,7 @@ class LowLevel2_eliminacion(LowLevels):
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
         '''Eliminamos un pasillo seleccionado al azar de la solución.'''
         # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         # Aquí se implementa la lógica específica del tercer nivel bajo
         pasillos_seleccionados = list(solucion.id_selected_runners)
@@ -193,7 +193,7 @@ class LowLevel1_swap(LowLevels):
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
         '''Eliminamos la orden con menos productos y agregamos una orden con más productos no seleccionada.'''
         # creamos una copia de la solución para no modificar la original
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         # Aquí se implementa la lógica específica del cuarto nivel bajo
         id_ordenes_seleccionadas = list(solucion.id_selected_orders)
@@ -241,7 +241,7 @@ class LowLevel1_factibilizadora(LowLevels):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         if solucion.total_units_order > solucion.instance.ub:
             # Ordena las órdenes seleccionadas de menor a mayor en unidades
@@ -273,7 +273,7 @@ class LowLevel2_factibilizadora(LowLevels):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         if solucion.total_units_order < solucion.instance.lb:
             unidades_actuales = solucion.total_units_order
@@ -314,7 +314,7 @@ class LowLevel3_factibilizadora(LowLevels):
         super().__init__(id, nombre)
 
     def implementacion(self, solucion_antigua: Solucion) -> Solucion:
-        solucion = copy.deepcopy(solucion_antigua)
+        solucion = solucion_antigua.copiar()
 
         if len(solucion.infesible_type()[2]) == 0:
             return solucion  # No hay infactibilidad por stock insuficiente
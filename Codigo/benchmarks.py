@@ -0,0 +1,340 @@
+import argparse
+import copy
+import glob
+import json
+import os
+import platform
+import random
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import Low_levels
+import Low_levels_copy
+from Instance import Solucion
+from instance_reader import leer_arreglos, leer_arreglos_con_cache, read_instance, read_instance_lineas
+
+
+def _copia_profunda_completa(self) -> Solucion:
+    """
+    Reproduce la copia usada antes de la copia compartida: duplica todo el grafo de la solución,
+    incluida la instancia con todas sus órdenes y corredores.
+    """
+    nueva = Solucion.__new__(Solucion)
+    nueva.__dict__ = copy.deepcopy(self.__dict__)
+    return nueva
+
+
+@contextmanager
+def copia_profunda_completa():
+    """
+    Contexto que hace que Solucion.copiar() vuelva a duplicar la instancia completa, para comparar
+    contra la versión anterior.
+    """
+    copiar_original = Solucion.copiar
+    Solucion.copiar = _copia_profunda_completa
+    try:
+        yield
+    finally:
+        Solucion.copiar = copiar_original
+
+
+def low_levels_disponibles(modulo=Low_levels) -> List[Low_levels.LowLevels]:
+    """
+    Instancia todas las low levels definidas en un módulo.
+
+    Args:
+        modulo: Módulo con las subclases de LowLevels (Low_levels o Low_levels_copy).
+
+    Returns:
+        List[LowLevels]: Una instancia de cada low level, con id correlativo.
+    """
+    clases = [obj for obj in vars(modulo).values()
+              if isinstance(obj, type) and issubclass(obj, modulo.LowLevels) and obj is not modulo.LowLevels]
+    return [clase(id=i, nombre=clase.__name__) for i, clase in enumerate(clases)]
+
+
+def medir_movimientos(solucion: Solucion, low_level, segundos: float, max_llamadas: int = 10_000) -> float:
+    """
+    Aplica repetidamente una low level sobre la misma solución y mide cuántos movimientos por segundo hace.
+
+    Args:
+        solucion (Solucion): Solución de partida (no se modifica).
+        low_level (LowLevels): Operador a medir.
+        segundos (float): Tiempo máximo de medición.
+        max_llamadas (int): Número máximo de llamadas.
+
+    Returns:
+        float: Movimientos por segundo, o NaN si el operador lanza una excepción.
+    """
+    llamadas = 0
+    inicio = time.perf_counter()
+    fin = inicio + segundos
+    try:
+        while llamadas < max_llamadas and time.perf_counter() < fin:
+            low_level.implementacion(solucion)
+            llamadas += 1
+    except Exception:
+        return float('nan')
+    return llamadas / (time.perf_counter() - inicio)
+
+
+def benchmark_movimientos(rutas: List[str], segundos: float = 1.0, semilla: int = 0) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Mide movimientos por segundo de cada low level con la copia completa (antes) y con la copia compartida (después).
+
+    Args:
+        rutas (List[str]): Archivos de instancia a evaluar.
+        segundos (float): Tiempo de medición por operador y modo.
+        semilla (int): Semilla para random y numpy.
+
+    Returns:
+        Dict: resultados[instancia][low_level] = {'antes': mov/s, 'despues': mov/s}
+    """
+    resultados = {}
+    for ruta in rutas:
+        instancia = read_instance(ruta)
+        solucion = instancia.constructora2()
+        nombre = os.path.basename(ruta)
+        resultados[nombre] = {}
+        for low_level in low_levels_disponibles():
+            random.seed(semilla)
+            np.random.seed(semilla)
+            with copia_profunda_completa():
+                antes = medir_movimientos(solucion, low_level, segundos)
+            random.seed(semilla)
+            np.random.seed(semilla)
+            despues = medir_movimientos(solucion, low_level, segundos)
+            resultados[nombre][low_level.nombre] = {'antes': antes, 'despues': despues}
+            print(f"{nombre} {low_level.nombre:28s} antes = {antes:10.1f} mov/s, después = {despues:10.1f} mov/s")
+    return resultados
+
+
+def _mismas_instancias(a, b) -> bool:
+    """
+    Compara dos instancias campo a campo (límites, órdenes, corredores y matrices).
+    """
+    return (a.num_items == b.num_items and a.lb == b.lb and a.ub == b.ub
+            and [o.items for o in a.orders] == [o.items for o in b.orders]
+            and [r.stock for r in a.runners] == [r.stock for r in b.runners]
+            and (a.orders_matrix != b.orders_matrix).nnz == 0
+            and (a.runners_matrix != b.runners_matrix).nnz == 0)
+
+
+def benchmark_parser(rutas: List[str], repeticiones: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Compara el tiempo de lectura del lector línea por línea con el lector vectorizado y verifica que
+    ambos construyan la misma instancia. 'arreglos' es sólo la tokenización y el recorte en arreglos CSR,
+    sin construir los objetos Order/Runner, y 'cache' es la carga de esos arreglos desde el cache binario.
+
+    Args:
+        rutas (List[str]): Archivos de instancia a leer.
+        repeticiones (int): Repeticiones por archivo (se reporta el mínimo).
+
+    Returns:
+        Dict: resultados[instancia] = {'lineas': s, 'vectorizado': s, 'arreglos': s, 'cache': s, 'iguales': bool}
+    """
+    resultados = {}
+    total_lineas = total_vectorizado = 0.0
+    for ruta in rutas:
+        tiempos = {}
+        lectores = (('lineas', read_instance_lineas), ('vectorizado', lambda ruta: read_instance(ruta, usar_cache=False)))
+        for nombre, lector in lectores:
+            mejor = float('inf')
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                instancia = lector(ruta)
+                mejor = min(mejor, time.perf_counter() - inicio)
+            tiempos[nombre] = mejor
+            tiempos['_' + nombre] = instancia
+        iguales = _mismas_instancias(tiempos.pop('_lineas'), tiempos.pop('_vectorizado'))
+        for nombre, lector in (('arreglos', leer_arreglos), ('cache', leer_arreglos_con_cache)):
+            leer_arreglos_con_cache(ruta)  # Asegura que el cache exista antes de medir
+            inicio = time.perf_counter()
+            lector(ruta)
+            tiempos[nombre] = time.perf_counter() - inicio
+        resultados[ruta] = {**tiempos, 'iguales': iguales}
+        total_lineas += tiempos['lineas']
+        total_vectorizado += tiempos['vectorizado']
+        print(f"{ruta:32s} líneas = {tiempos['lineas'] * 1000:8.1f} ms, vectorizado = {tiempos['vectorizado'] * 1000:8.1f} ms, "
+              f"(arreglos = {tiempos['arreglos'] * 1000:7.1f} ms, cache = {tiempos['cache'] * 1000:6.2f} ms), x{tiempos['lineas'] / tiempos['vectorizado']:5.2f}, iguales = {iguales}")
+    print(f"{'TOTAL':32s} líneas = {total_lineas * 1000:8.1f} ms, vectorizado = {total_vectorizado * 1000:8.1f} ms")
+    return resultados
+
+
+def medir_llamadas(funcion: Callable[[], object], repeticiones: int = 5, segundos: float = 0.2,
+                   max_llamadas: int = 10_000) -> Dict[str, float]:
+    """
+    Mide llamadas por segundo de una función sin argumentos, en varias repeticiones independientes.
+
+    Args:
+        funcion (Callable[[], object]): Función a medir.
+        repeticiones (int): Número de repeticiones (cada una da una muestra de llamadas/s).
+        segundos (float): Tiempo máximo por repetición.
+        max_llamadas (int): Número máximo de llamadas por repetición.
+
+    Returns:
+        Dict[str, float]: {'media', 'desviacion', 'repeticiones'} en llamadas/s, o {'error'} si la función lanza una excepción.
+    """
+    muestras = []
+    try:
+        for _ in range(repeticiones):
+            llamadas = 0
+            inicio = time.perf_counter()
+            fin = inicio + segundos
+            while llamadas < max_llamadas and time.perf_counter() < fin:
+                funcion()
+                llamadas += 1
+            muestras.append(llamadas / (time.perf_counter() - inicio))
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    return {'media': float(np.mean(muestras)), 'desviacion': float(np.std(muestras)), 'repeticiones': len(muestras)}
+
+
+def casos_operadores(ruta: str) -> Dict[str, Callable[[], object]]:
+    """
+    Arma los casos a medir para una instancia: la lectura, la construcción y los métodos de Solucion,
+    y cada low level de Low_levels y Low_levels_copy sobre las soluciones de constructora1 y constructora2.
+
+    Returns:
+        Dict[str, Callable[[], object]]: nombre del caso -> función sin argumentos.
+    """
+    instancia = read_instance(ruta)
+    casos = {'read_instance': lambda: read_instance(ruta)}
+    for constructora in ('constructora1', 'constructora2'):
+        solucion = getattr(instancia, constructora)()
+        ordenes, runners = list(solucion.selected_orders), list(solucion.selected_runners)
+        copia = solucion.copiar()
+        casos[f'{constructora}/Solucion.__init__'] = lambda o=ordenes, r=runners: Solucion(o, r, instancia)
+        casos[f'{constructora}/actualizar_atributos'] = copia.actualizar_atributos
+        casos[f'{constructora}/costo_infactible'] = solucion.costo_infactible
+        for modulo in (Low_levels, Low_levels_copy):
+            for low_level in low_levels_disponibles(modulo):
+                casos[f'{constructora}/{modulo.__name__}.{low_level.nombre}'] = lambda ll=low_level, s=solucion: ll.implementacion(s)
+    return casos
+
+
+def benchmark_operadores(rutas: List[str], repeticiones: int = 5, segundos: float = 0.2, semilla: int = 0) -> Dict:
+    """
+    Mide llamadas/s (media y desviación entre repeticiones) de cada low level y de las operaciones básicas
+    de Instance y Solucion, para cada instancia.
+
+    Args:
+        rutas (List[str]): Archivos de instancia.
+        repeticiones (int): Repeticiones por caso.
+        segundos (float): Tiempo por repetición.
+        semilla (int): Semilla para random y numpy, fijada antes de cada caso.
+
+    Returns:
+        Dict: {'meta': {...}, 'resultados': {instancia: {caso: {'media', 'desviacion', 'repeticiones'} o {'error'}}}}
+    """
+    resultados = {}
+    for ruta in rutas:
+        nombre = os.path.basename(ruta)
+        resultados[nombre] = {}
+        for caso, funcion in casos_operadores(ruta).items():
+            random.seed(semilla)
+            np.random.seed(semilla)
+            medicion = medir_llamadas(funcion, repeticiones, segundos)
+            resultados[nombre][caso] = medicion
+            if 'error' in medicion:
+                print(f"{nombre} {caso:60s} error: {medicion['error']}")
+            else:
+                print(f"{nombre} {caso:60s} {medicion['media']:12.1f} ± {medicion['desviacion']:10.1f} llamadas/s")
+    meta = {'fecha': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': sys.version.split()[0], 'numpy': np.__version__,
+            'plataforma': platform.platform(), 'repeticiones': repeticiones, 'segundos': segundos, 'semilla': semilla}
+    return {'meta': meta, 'resultados': resultados}
+
+
+def comparar_con_base(actual: Dict, base: Dict, tolerancia: float = 0.1) -> List[str]:
+    """
+    Compara una corrida de benchmark_operadores con una corrida base. Un caso es una regresión si su media
+    de llamadas/s cae más que la tolerancia relativa y más que dos desviaciones (de ambas corridas) respecto a la base.
+
+    Args:
+        actual (Dict): Resultado de benchmark_operadores.
+        base (Dict): Resultado guardado de una corrida anterior.
+        tolerancia (float): Caída relativa permitida (0.1 = 10%).
+
+    Returns:
+        List[str]: Descripción de cada regresión encontrada.
+    """
+    regresiones = []
+    for instancia, casos in actual['resultados'].items():
+        for caso, medicion in casos.items():
+            anterior = base['resultados'].get(instancia, {}).get(caso)
+            if anterior is None or 'media' not in anterior:
+                continue
+            if 'media' not in medicion:
+                regresiones.append(f"{instancia} {caso}: {medicion['error']} (antes {anterior['media']:.1f} llamadas/s)")
+                continue
+            caida = anterior['media'] - medicion['media']
+            ruido = 2 * (anterior['desviacion'] + medicion['desviacion'])
+            if caida > tolerancia * anterior['media'] and caida > ruido:
+                regresiones.append(f"{instancia} {caso}: {anterior['media']:.1f} -> {medicion['media']:.1f} llamadas/s "
+                                   f"({-caida / anterior['media']:+.1%})")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento de la hiper heurística.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_mov = subparsers.add_parser("movimientos", help="Movimientos/s de cada low level, copia completa vs compartida.")
+    p_mov.add_argument("rutas", nargs="*", default=["datasets/b"], help="Archivos o directorios de instancias.")
+    p_mov.add_argument("--segundos", type=float, default=1.0)
+    p_mov.add_argument("--semilla", type=int, default=0)
+
+    p_parser = subparsers.add_parser("parser", help="Tiempo de lectura de instancias, lector por líneas vs vectorizado.")
+    p_parser.add_argument("rutas", nargs="*", default=["datasets/a", "datasets/b"], help="Archivos o directorios de instancias.")
+    p_parser.add_argument("--repeticiones", type=int, default=3)
+
+    p_op = subparsers.add_parser("operadores", help="Llamadas/s de cada low level y de Solucion, con comparación contra una corrida base.")
+    p_op.add_argument("rutas", nargs="*", default=["datasets/a", "datasets/b"], help="Archivos o directorios de instancias.")
+    p_op.add_argument("--repeticiones", type=int, default=5)
+    p_op.add_argument("--segundos", type=float, default=0.2, help="Tiempo por repetición de cada caso.")
+    p_op.add_argument("--semilla", type=int, default=0)
+    p_op.add_argument("--guardar", help="Archivo JSON donde guardar los resultados.")
+    p_op.add_argument("--base", help="Archivo JSON de una corrida anterior para detectar regresiones.")
+    p_op.add_argument("--tolerancia", type=float, default=0.1, help="Caída relativa permitida antes de marcar una regresión.")
+
+    args = parser.parse_args()
+    rutas = _expandir_rutas(args.rutas)
+
+    if args.comando == "movimientos":
+        benchmark_movimientos(rutas, segundos=args.segundos, semilla=args.semilla)
+    elif args.comando == "parser":
+        benchmark_parser(rutas, repeticiones=args.repeticiones)
+    elif args.comando == "operadores":
+        resultado = benchmark_operadores(rutas, repeticiones=args.repeticiones, segundos=args.segundos, semilla=args.semilla)
+        if args.guardar:
+            with open(args.guardar, 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, indent=2, ensure_ascii=False)
+        if args.base:
+            with open(args.base, encoding='utf-8') as f:
+                regresiones = comparar_con_base(resultado, json.load(f), args.tolerancia)
+            for regresion in regresiones:
+                print(f"REGRESIÓN {regresion}")
+            print(f"{len(regresiones)} regresiones respecto a {args.base}")
+            if regresiones:
+                sys.exit(1)
+
+
+def _expandir_rutas(rutas: List[str]) -> List[str]:
+    """
+    Expande directorios a la lista ordenada de archivos .txt que contienen.
+    """
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos.extend(sorted(glob.glob(os.path.join(ruta, "*.txt"))))
+        else:
+            archivos.append(ruta)
+    return archivos
+
+
+if __name__ == "__main__":
+    main()
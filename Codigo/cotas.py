@@ -0,0 +1,125 @@
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix, hstack, identity, vstack
+
+from Instance import Instance
+from modelo_milp import ModeloMILP
+
+# Holgura numérica al comparar una incumbente con una cota
+TOLERANCIA = 1e-9
+
+
+def stock_util_por_corredor(instancia: Instance) -> np.ndarray:
+    """
+    Unidades de cada corredor que alguna wave podría llegar a usar: por ítem, el mínimo entre su stock
+    y la demanda total de las órdenes que caben en UB.
+
+    Args:
+        instancia (Instance): Instancia del problema.
+
+    Returns:
+        np.ndarray: Stock útil de cada corredor.
+    """
+    atendibles = instancia.orders_units <= instancia.ub
+    demanda = np.asarray(instancia.orders_matrix[atendibles].sum(axis=0)).ravel()
+    matriz = instancia.runners_matrix
+    util = np.minimum(matriz.data, demanda[matriz.indices])
+    return np.asarray(csr_matrix((util, matriz.indices, matriz.indptr), shape=matriz.shape).sum(axis=1)).ravel()
+
+
+def cotas_por_k(instancia: Instance, k_max: Optional[int] = None) -> np.ndarray:
+    """
+    Cota superior de la razón unidades/corredores para cada cantidad exacta de corredores k: una wave con k
+    corredores no lleva más de UB unidades ni más que el stock útil de los k corredores con más stock útil.
+    Si ni así se alcanza LB, la cota es 0 (ninguna wave con k corredores es factible).
+
+    Args:
+        instancia (Instance): Instancia del problema.
+        k_max (Optional[int]): Mayor k a acotar (por defecto, todos los corredores).
+
+    Returns:
+        np.ndarray: Cota de la razón para k = 1..k_max (posición k - 1).
+    """
+    k_max = len(instancia.runners) if k_max is None else min(k_max, len(instancia.runners))
+    stock_util = np.sort(stock_util_por_corredor(instancia))[::-1][:k_max]
+    unidades = np.minimum(np.cumsum(stock_util, dtype=float), instancia.ub)
+    unidades[unidades < instancia.lb] = 0
+    return unidades / np.arange(1, k_max + 1)
+
+
+def cota_ratio(instancia: Instance) -> float:
+    """
+    Cota superior de la razón unidades/corredores de cualquier wave factible (máximo de cotas_por_k).
+    """
+    cotas = cotas_por_k(instancia)
+    return float(cotas.max()) if len(cotas) else 0.0
+
+
+def cota_lp_k(modelo: ModeloMILP, k: int) -> float:
+    """
+    Cota de la razón con exactamente k corredores a partir de la relajación lineal del modelo: el máximo de unidades
+    de la relajación dividido por k.
+
+    Args:
+        modelo (ModeloMILP): Modelo de la instancia (no se modifica).
+        k (int): Cantidad de corredores.
+
+    Returns:
+        float: Cota de la razón (0 si la relajación es infactible).
+    """
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    cota_inf, cota_sup = modelo.cota_inf.copy(), modelo.cota_sup.copy()
+    cota_inf[modelo.fila_corredores] = cota_sup[modelo.fila_corredores] = k
+    r = milp(-modelo.objetivo(), bounds=Bounds(0, 1), constraints=LinearConstraint(modelo.matriz, cota_inf, cota_sup))
+    return -r.fun / k if r.status == 0 else 0.0
+
+
+def cota_lp_ratio(modelo: ModeloMILP) -> float:
+    """
+    Cota de la razón para cualquier cantidad de corredores, con la relajación lineal del problema fraccional
+    (transformación de Charnes-Cooper): con t = 1 / corredores, z = t·x y w = t·y se maximiza unidades·z sujeto a
+    las restricciones del modelo multiplicadas por t, suma de w = 1, z, w <= t y t <= 1.
+
+    Args:
+        modelo (ModeloMILP): Modelo de la instancia (no se modifica).
+
+    Returns:
+        float: Cota de la razón (0 si la relajación es infactible).
+    """
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    n = modelo.num_variables
+    unidades = modelo.objetivo()
+    stock = modelo.matriz[:modelo.fila_unidades]
+    filas = vstack([
+        hstack([stock, _columna(np.zeros(stock.shape[0]))]),                         # stock·[z, w] <= 0
+        hstack([csr_matrix(unidades), _columna([-modelo.instancia.ub])]),            # unidades·z <= UB·t
+        hstack([csr_matrix(unidades), _columna([-modelo.instancia.lb])]),            # unidades·z >= LB·t
+        hstack([csr_matrix(np.r_[np.zeros(modelo.num_ordenes), np.ones(modelo.num_corredores)]), _columna([0])]),  # suma w = 1
+        hstack([identity(n, format="csr"), _columna(-np.ones(n))]),                 # z, w <= t
+    ], format="csr")
+    cota_inf = np.r_[np.full(stock.shape[0], -np.inf), -np.inf, 0, 1, np.full(n, -np.inf)]
+    cota_sup = np.r_[np.zeros(stock.shape[0]), 0, np.inf, 1, np.zeros(n)]
+    objetivo = np.r_[unidades, 0]
+    r = milp(-objetivo, bounds=Bounds(0, np.r_[np.full(n, np.inf), 1]), constraints=LinearConstraint(filas, cota_inf, cota_sup))
+    return -r.fun if r.status == 0 else 0.0
+
+
+def _columna(valores) -> csr_matrix:
+    return csr_matrix(np.asarray(valores, dtype=float).reshape(-1, 1))
+
+
+def alcanza_cota(valor: float, cota: float, gap: float = 0.0) -> bool:
+    """
+    Indica si una incumbente está a lo más a un gap relativo de la cota, de modo que seguir buscando no puede
+    mejorarla en más que ese gap.
+
+    Args:
+        valor (float): Razón de la incumbente.
+        cota (float): Cota superior de la razón.
+        gap (float): Gap relativo aceptado (0 exige alcanzar la cota).
+
+    Returns:
+        bool: Si se puede terminar la búsqueda.
+    """
+    return valor >= (1 - gap) * cota - TOLERANCIA
@@ -1,18 +1,93 @@
-from typing import Dict, List
+from typing import Dict, Optional
 
-class Order:
+import numpy as np
+
+
+class FilaPorItem:
     """
-    Representa una orden compuesta por varios ítems y sus cantidades solicitadas.
+    Base de Order y Runner: una fila de pares (ítem, cantidad) guardada como el tramo [inicio, fin) de dos
+    arreglos NumPy compartidos por todas las filas de la instancia (los indices y data de orders_matrix o
+    runners_matrix). Cada objeto sólo guarda la referencia a los arreglos y los límites del tramo; el
+    diccionario item_id -> cantidad se construye cuando se pide.
 
     Attributes:
-        index (int): Índice de la orden (de 0 a o - 1).
-        items (Dict[int, int]): Diccionario con item_id como clave y cantidad solicitada como valor.
+        index (int): Índice de la fila.
+        total_units (int): Suma de las cantidades de la fila.
+        item_ids (np.ndarray): Vista con los ids de los ítems de la fila.
+        quantities (np.ndarray): Vista con la cantidad de cada ítem de la fila.
     """
+    __slots__ = ('index', 'total_units', '_item_ids', '_quantities', '_inicio', '_fin')
 
     def __init__(self, index: int, items: Dict[int, int]):
         self.index = index
-        self.items = items
-        self.total_units = sum(self.items.values())
+        self._item_ids = np.fromiter(items.keys(), dtype=np.int64, count=len(items))
+        self._quantities = np.fromiter(items.values(), dtype=np.int64, count=len(items))
+        self._inicio = 0
+        self._fin = len(items)
+        self.total_units = sum(items.values())
+
+    @classmethod
+    def desde_arreglos(cls, index: int, item_ids: np.ndarray, quantities: np.ndarray, inicio: int, fin: int,
+                       total_units: Optional[int] = None):
+        """
+        Crea la fila como tramo de arreglos compartidos, sin copiarlos.
+
+        Args:
+            index (int): Índice de la fila.
+            item_ids (np.ndarray): Ids de ítems de todas las filas.
+            quantities (np.ndarray): Cantidades de todas las filas.
+            inicio (int): Posición del primer par de la fila.
+            fin (int): Posición siguiente al último par de la fila.
+            total_units (Optional[int]): Suma de las cantidades, si ya se conoce.
+        """
+        fila = cls.__new__(cls)
+        fila.index = index
+        fila._item_ids = item_ids
+        fila._quantities = quantities
+        fila._inicio = inicio
+        fila._fin = fin
+        fila.total_units = int(quantities[inicio:fin].sum()) if total_units is None else total_units
+        return fila
+
+    @property
+    def item_ids(self) -> np.ndarray:
+        return self._item_ids[self._inicio:self._fin]
+
+    @property
+    def quantities(self) -> np.ndarray:
+        return self._quantities[self._inicio:self._fin]
+
+    def a_diccionario(self) -> Dict[int, int]:
+        """
+        Diccionario item_id -> cantidad de la fila (nuevo en cada llamada).
+        """
+        return dict(zip(self.item_ids.tolist(), self.quantities.tolist()))
+
+    def cantidad(self, item_id: int) -> int:
+        """
+        Cantidad de un ítem en la fila (0 si no está).
+        """
+        posiciones = np.flatnonzero(self.item_ids == item_id)
+        return int(self.quantities[posiciones[0]]) if len(posiciones) else 0
+
+    def __len__(self) -> int:
+        return self._fin - self._inicio
+
+
+class Order(FilaPorItem):
+    """
+    Representa una orden compuesta por varios ítems y sus cantidades solicitadas.
+
+    Attributes:
+        index (int): Índice de la orden (de 0 a o - 1).
+        items (Dict[int, int]): Diccionario con item_id como clave y cantidad solicitada como valor
+            (se construye al pedirlo desde item_ids y quantities).
+    """
+    __slots__ = ()
+
+    @property
+    def items(self) -> Dict[int, int]:
+        return self.a_diccionario()
 
     def __str__(self):
         """
@@ -24,20 +99,24 @@ class Order:
         return f"Order {self.index}: {self.items} (Total units: {self.total_units})"
 
 
-class Runner:
+class Runner(FilaPorItem):
     """
     Representa un corredor con un stock limitado de ítems disponibles.
 
     Attributes:
         index (int): Índice del corredor (de 0 a a - 1).
-        stock (Dict[int, int]): Diccionario con item_id como clave y unidades disponibles como valor.
+        stock (Dict[int, int]): Diccionario con item_id como clave y unidades disponibles como valor
+            (se construye al pedirlo desde item_ids y quantities).
     """
+    __slots__ = ()
 
     def __init__(self, index: int, stock: Dict[int, int]):
-        self.index = index
-        self.stock = stock
-        self.total_units = sum(self.stock.values())
-        
+        super().__init__(index, stock)
+
+    @property
+    def stock(self) -> Dict[int, int]:
+        return self.a_diccionario()
+
     def can_fulfill(self, item_id: int, quantity: int) -> bool:
         """
         Verifica si el corredor puede abastecer una cantidad específica de un ítem.
@@ -49,8 +128,8 @@ class Runner:
         Returns:
             bool: True si el corredor puede cumplir con la cantidad solicitada, False en caso contrario.
         """
-        return self.stock.get(item_id, 0) >= quantity
-    
+        return self.cantidad(item_id) >= quantity
+
     def __str__(self):
         """
         Representación en cadena del corredor.
@@ -59,5 +138,3 @@ class Runner:
             str: Cadena que representa el corredor y su stock.
         """
         return f"Runner {self.index}: {self.stock}, Total units: {self.total_units})"
-
-
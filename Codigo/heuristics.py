@@ -1,5 +1,5 @@
 from typing import List, Tuple
-from collections import defaultdict
+import numpy as np
 from data_structures import Order, Runner
 from Instance import Instance
 
@@ -21,37 +21,37 @@ def greedy_wave_selection(instance: Instance) -> Tuple[List[Order], List[Runner]
     selected_orders: List[Order] = []
     total_units = 0
 
-    sorted_orders = sorted(instance.orders, key=lambda o: o.total_units(), reverse=True)
+    sorted_orders = np.argsort(-instance.orders_units, kind='stable').tolist()
+    units = instance.orders_units.tolist()
 
-    for order in sorted_orders:
-        if total_units + order.total_units() <= instance.ub:
-            selected_orders.append(order)
-            total_units += order.total_units()
+    for id_order in sorted_orders:
+        if total_units + units[id_order] <= instance.ub:
+            selected_orders.append(instance.orders[id_order])
+            total_units += units[id_order]
 
     if total_units < instance.lb:
         return [], []
 
-    remaining_needs = defaultdict(int)
-    for order in selected_orders:
-        for item, qty in order.items.items():
-            remaining_needs[item] += qty
+    # Demanda pendiente por ítem; sólo se revisan los ítems de cada corredor y se lleva la cuenta
+    # de cuántos ítems siguen con demanda pendiente
+    remaining_needs = instance.demanda_por_item(order.index for order in selected_orders)
+    pending_items = np.count_nonzero(remaining_needs > 0)
 
-    used_runners = set()
+    matrix = instance.runners_matrix
+    used_runners = []
     for runner in instance.runners:
-        contribution = False
-        for item, available in runner.stock.items():
-            if remaining_needs[item] > 0:
-                used = min(remaining_needs[item], available)
-                remaining_needs[item] -= used
-                if used > 0:
-                    contribution = True
-        if contribution:
-            used_runners.add(runner)
-
-        if all(v <= 0 for v in remaining_needs.values()):
+        if pending_items == 0:
             break
-
-    if any(v > 0 for v in remaining_needs.values()):
+        start, end = matrix.indptr[runner.index], matrix.indptr[runner.index + 1]
+        items = matrix.indices[start:end]
+        needs = remaining_needs[items]
+        used = np.minimum(np.maximum(needs, 0), matrix.data[start:end])
+        if used.any():
+            used_runners.append(runner)
+            remaining_needs[items] = needs - used
+            pending_items -= np.count_nonzero((needs > 0) & (needs - used <= 0))
+
+    if pending_items > 0:
         return [], []
 
-    return selected_orders, list(used_runners)
+    return selected_orders, used_runners
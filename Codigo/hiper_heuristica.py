@@ -0,0 +1,535 @@
+import argparse
+import json
+import os
+import queue
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from cotas import alcanza_cota, cota_ratio
+from Instance import CacheEvaluaciones, Instance, Solucion, contador_perezosos
+from Low_levels import LowLevels, instanciar_low_levels
+from funciones_auxiliares import seleccionar_segun_probabilidad
+from instance_reader import read_instance
+from instrumentacion import EstadisticasLowLevels, RegistroEventos
+
+
+class CachePrefijos:
+    """
+    Cache LRU acotado de (prefijo de secuencia de low levels) -> solución resultante de aplicarlo a la candidata actual.
+    Sólo guarda prefijos formados por low levels deterministas, cuyo resultado depende únicamente de la solución
+    de entrada, y se vacía cada vez que cambia la candidata.
+
+    Atributos:
+        capacidad (int): Máximo de prefijos guardados (0 desactiva el cache).
+        aciertos (int): Low levels que no se aplicaron porque su prefijo estaba en el cache.
+        fallos (int): Prefijos deterministas buscados y no encontrados.
+        invalidaciones (int): Veces que se vació el cache por cambio de candidata.
+    """
+    def __init__(self, capacidad: int = 64):
+        self.capacidad = capacidad
+        self.entradas: "OrderedDict[Tuple[int, ...], Solucion]" = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def buscar(self, prefijo: Tuple[int, ...]) -> Optional[Solucion]:
+        solucion = self.entradas.get(prefijo)
+        if solucion is None:
+            self.fallos += 1
+            return None
+        self.entradas.move_to_end(prefijo)
+        self.aciertos += 1
+        return solucion
+
+    def guardar(self, prefijo: Tuple[int, ...], solucion: Solucion):
+        self.entradas[prefijo] = solucion
+        if len(self.entradas) > self.capacidad:
+            self.entradas.popitem(last=False)
+
+    def invalidar(self):
+        if self.entradas:
+            self.entradas.clear()
+            self.invalidaciones += 1
+
+    def resumen(self) -> Dict[str, float]:
+        consultas = self.aciertos + self.fallos
+        return {'aciertos': self.aciertos, 'fallos': self.fallos, 'invalidaciones': self.invalidaciones,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0}
+
+
+class HiperHeuristica():
+    '''Hiper heurística que elige secuencias de low levels según las matrices de transición aprendidas (T) y de freno (S).'''
+    def __init__(self, instancia: Instance, V: float, low_levels: List[LowLevels], duracion: float = 600,
+                 semilla: Optional[int] = None, verbose: bool = False, registro: Optional[RegistroEventos] = None,
+                 capacidad_cache: int = 64, tamano_tabu: int = 0, cota: Optional[float] = None, gap_cota: float = 0.0):
+        '''
+        Args:
+            instancia (Instance): Instancia del problema.
+            V (float): Holgura inicial para aceptar soluciones peores que la mejor (condición 2).
+            low_levels (List[LowLevels]): Low levels disponibles; el id de cada una debe ser su posición en la lista.
+            duracion (float): Segundos de búsqueda.
+            semilla (Optional[int]): Semilla de random y numpy.random (las low levels usan ambos).
+            verbose (bool): Si se imprime el progreso por consola (cada 100 secuencias aplicadas, si no se da un registro).
+            registro (Optional[RegistroEventos]): Registro donde se anota cada secuencia aplicada (muestreado según el registro).
+            capacidad_cache (int): Prefijos deterministas guardados en el cache de secuencias (0 lo desactiva).
+            tamano_tabu (int): Huellas de candidatas recientes que no se vuelven a aceptar salvo que mejoren la mejor solución (0 desactiva la lista tabú).
+            cota (Optional[float]): Cota superior de la razón (por defecto, cotas.cota_ratio de la instancia).
+            gap_cota (float): La búsqueda termina antes de duracion cuando la mejor factible está a este gap relativo de la cota.
+        '''
+        if semilla is not None:
+            random.seed(semilla)
+            np.random.seed(semilla)
+        contador_perezosos.reiniciar() # Los atributos perezosos de Solucion se cuentan desde aquí
+        self.instancia = instancia # objeto instancia
+        self.V = V #
+        self.low_levels = low_levels # lista con low levels
+        self.n = len(self.low_levels) # int que tiene el número de low levels
+        self.P = np.ones((self.n,self.n)) # Matriz de contador mejora
+        self.T = np.zeros((self.n,self.n)) # Matriz transicion mejora
+        self.Q = np.ones((self.n, 2)) # Matriz de contador freno
+        self.S = np.zeros((self.n, 2)) # Matriz de probabilidad de freno
+        self.mejor_sol = self.instancia.constructora2()
+        self.mejor_factible = self.mejor_sol if self.mejor_sol.is_factible else None # Mejor solución factible encontrada
+        self.candidata = self.mejor_sol
+        self.s = instancia.ub
+        self.duracion = duracion # segundos maximos
+        self.iteraciones = 0
+        self.migrantes_adoptados = 0
+        self.verbose = verbose
+        if registro is None and verbose:
+            registro = RegistroEventos(capacidad=100, imprimir=True)
+        self.registro = registro # Eventos de la búsqueda (None: no se registra nada)
+        self.cache_prefijos = CachePrefijos(capacidad_cache) # Resultados de prefijos deterministas aplicados a la candidata
+        self.tabu = CacheEvaluaciones(tamano_tabu) if tamano_tabu > 0 else None # Huellas de candidatas recientes
+        if self.tabu is not None:
+            self.tabu.guardar(self.candidata.huella, self.candidata.evaluacion())
+        self.rechazos_tabu = 0
+        self.estadisticas = EstadisticasLowLevels([low_level.nombre for low_level in low_levels]) # Contadores por low level
+        self.cota = cota_ratio(instancia) if cota is None else cota # Cota superior de la razón
+        self.gap_cota = gap_cota
+        self.terminada_por_cota = False
+        self.perezosos = None # contador_perezosos.resumen() al terminar implementar
+
+    def actualizar_matrices_T_S(self):
+        ''' Descripción:
+        Método que actualiza las matrices
+            Args :
+            *   None
+            Return :
+            *   None
+            '''
+        self.T = self.P / self.P.sum(axis=1, keepdims=True)
+        self.S = self.Q / self.Q.sum(axis=1, keepdims=True)
+
+    def implementar(self, migrar: Optional[Callable[["HiperHeuristica"], None]] = None,
+                    intervalo_migracion: float = 5.0) -> Optional[Solucion]:
+        '''Ejecuta la búsqueda durante self.duracion segundos.
+
+        Args:
+            migrar (Optional[Callable[[HiperHeuristica], None]]): Función que se llama cada intervalo_migracion
+                segundos con la propia hiper heurística (modelo de islas, ver ejecutar_isla).
+            intervalo_migracion (float): Segundos entre llamadas a migrar.
+
+        Returns:
+            Optional[Solucion]: Mejor solución factible encontrada, o None si no se encontró ninguna.
+        '''
+        self.actualizar_matrices_T_S()
+        i_last = random.choice(self.low_levels)
+        id_last =  i_last.id
+        secuencia = []
+        secuencia.append(id_last)
+
+        tiempo_inicio = time.time()
+        tiempo_maximo = tiempo_inicio + self.duracion
+        proxima_migracion = tiempo_inicio + intervalo_migracion
+
+        while tiempo_maximo - time.time() > 0 and not self.alcanza_cota():
+            self.iteraciones += 1
+            if migrar is not None and time.time() >= proxima_migracion:
+                migrar(self)
+                proxima_migracion = time.time() + intervalo_migracion
+            id_next = seleccionar_segun_probabilidad(self.T[id_last])
+            secuencia.append(id_next)
+            # ahora elegimos el valor u
+            u_next = seleccionar_segun_probabilidad(self.S[id_last])
+
+            if u_next == 1:
+                # Las low levels no modifican la solución que reciben (copian o la retornan tal cual),
+                # así que las soluciones se pueden guardar sin copiarlas
+                sol_temporal = self.candidata
+                # Mientras el prefijo sea de low levels deterministas, su resultado sobre la candidata se puede reutilizar
+                usar_cache = self.cache_prefijos.capacidad > 0
+                for largo, id in enumerate(secuencia, start=1):
+                    low_level = self.low_levels[id]
+                    usar_cache = usar_cache and low_level.determinista
+                    if usar_cache:
+                        prefijo = tuple(secuencia[:largo])
+                        guardada = self.cache_prefijos.buscar(prefijo)
+                        if guardada is not None:
+                            sol_temporal = guardada
+                            continue
+                    entrada = sol_temporal
+                    inicio_llamada = time.perf_counter()
+                    sol_temporal = low_level.implementacion(entrada)
+                    self.estadisticas.registrar_llamada(id, time.perf_counter() - inicio_llamada, entrada, sol_temporal,
+                                                        sol_temporal is not entrada and self.condicion_1(sol_temporal, entrada))
+                    if usar_cache:
+                        self.cache_prefijos.guardar(prefijo, sol_temporal)
+
+                acepta_candidata = self.condicion_1(sol_temporal, self.candidata) or self.condicion_2(sol_temporal, self.mejor_sol, tiempo_inicio, self.V)
+                mejora_mejor = self.condicion_1(sol_temporal, self.mejor_sol)
+                if (acepta_candidata and self.tabu is not None and not mejora_mejor
+                        and sol_temporal is not self.candidata and sol_temporal.huella in self.tabu):
+                    acepta_candidata = False
+                    self.rechazos_tabu += 1
+                self.estadisticas.registrar_aceptacion(secuencia, acepta_candidata, mejora_mejor)
+
+                if acepta_candidata:
+                    if sol_temporal is not self.candidata:
+                        self.cache_prefijos.invalidar()
+                        if self.tabu is not None:
+                            self.tabu.guardar(sol_temporal.huella, sol_temporal.evaluacion())
+                    self.candidata = sol_temporal
+                    for id in range(len(secuencia)-1):
+                        self.P[secuencia[id], secuencia[id+1]] = self.P[secuencia[id], secuencia[id+1]] + 1
+                        self.Q[secuencia[id], 0] = self.Q[secuencia[id], 0] + 1
+                    self.Q[secuencia[-1], 1] = self.Q[secuencia[-1], 1] + 1
+
+                    self.actualizar_matrices_T_S()
+
+                if mejora_mejor:
+                    self.mejor_sol = sol_temporal
+
+                if sol_temporal.is_factible and (self.mejor_factible is None or sol_temporal.objective_value > self.mejor_factible.objective_value):
+                    self.mejor_factible = sol_temporal
+
+                if self.registro is not None:
+                    self.registro.registrar(self.iteraciones, secuencia, self.candidata.objective_value, self.mejor_sol.objective_value,
+                                            self.candidata.is_factible, self.mejor_sol.is_factible, forzar=mejora_mejor)
+                secuencia = []
+
+            id_last = id_next
+
+        self.terminada_por_cota = self.alcanza_cota()
+        self.perezosos = contador_perezosos.resumen()
+        if self.registro is not None:
+            self.registro.vaciar()
+        return self.mejor_factible
+
+    def alcanza_cota(self) -> bool:
+        '''Si la mejor solución factible ya está a gap_cota de la cota, de modo que seguir buscando no la puede mejorar más que eso.'''
+        return self.mejor_factible is not None and alcanza_cota(self.mejor_factible.objective_value, self.cota, self.gap_cota)
+
+    def condicion_1(self, sol_temporal: Solucion, sol_candidata : Solucion):
+        if self.valor_penalizado(sol_temporal) > self.valor_penalizado(sol_candidata):
+            return True
+        return False
+
+    def valor_penalizado(self, solucion: Solucion) -> float:
+        '''Valor objetivo menos la infactibilidad ponderada por s, que es lo que comparan las condiciones de aceptación.'''
+        return solucion.objective_value - self.s*solucion.costo_infactible()
+
+    def recibir_migrante(self, migrante: Solucion, P_migrante: np.ndarray, mezcla: float) -> bool:
+        '''Ofrece a la isla una solución de otra isla junto con la matriz P que la produjo.
+
+        Si el migrante es mejor que la candidata (condición 1) pasa a ser la candidata, y cada fila de P se mezcla
+        con la fila de P_migrante reescalada a la misma suma, de modo que la isla conserva su cantidad de evidencia.
+
+        Args:
+            migrante (Solucion): Solución de otra isla, construida sobre self.instancia.
+            P_migrante (np.ndarray): Matriz P de la isla de origen.
+            mezcla (float): Peso (entre 0 y 1) de las filas de P_migrante.
+
+        Returns:
+            bool: Si el migrante fue adoptado.
+        '''
+        if not self.condicion_1(migrante, self.candidata):
+            return False
+        self.candidata = migrante
+        self.cache_prefijos.invalidar()
+        self.migrantes_adoptados += 1
+        if self.condicion_1(migrante, self.mejor_sol):
+            self.mejor_sol = migrante
+        if migrante.is_factible and (self.mejor_factible is None or migrante.objective_value > self.mejor_factible.objective_value):
+            self.mejor_factible = migrante
+        suma_filas = self.P.sum(axis=1, keepdims=True)
+        self.P = (1 - mezcla)*self.P + mezcla*P_migrante/P_migrante.sum(axis=1, keepdims=True)*suma_filas
+        self.actualizar_matrices_T_S()
+        return True
+
+    def condicion_2(self, sol_temporal: Solucion, mejor_sol: Solucion, tiempo_inicio: float, V: float):
+        time_el = time.time()-tiempo_inicio #Elapsed time
+
+        if mejor_sol.is_factible: #Calculo de threshold según factibilidad de mejor solución
+            rho = 10**-5 + V*(1-(time_el)/self.duracion)
+        else:
+            rho = 10**-3
+
+        if sol_temporal.objective_value - self.s*sol_temporal.costo_infactible()  > (1 + rho)*(mejor_sol.objective_value - self.s*mejor_sol.costo_infactible()):
+            return True
+        return False
+
+
+class ResultadoCadena(NamedTuple):
+    """
+    Resultado de una cadena independiente de la hiper heurística. Las soluciones viajan entre procesos
+    como tuplas de ids, sin la instancia.
+    """
+    semilla: int
+    objetivo: Optional[float]  # Valor objetivo de la mejor solución factible (None si no hubo)
+    ids_ordenes: Tuple[int, ...]
+    ids_runners: Tuple[int, ...]
+    iteraciones: int
+    P: np.ndarray
+    Q: np.ndarray
+    migrantes_adoptados: int = 0
+    estadisticas: Optional[Dict[str, Dict[str, float]]] = None  # EstadisticasLowLevels.resumen() de la cadena
+    cache: Optional[Dict[str, float]] = None  # CachePrefijos.resumen() de la cadena
+    perezosos: Optional[Dict[str, Dict[str, int]]] = None  # Atributos perezosos de Solucion calculados y evitados
+
+
+def ejecutar_cadena(ruta_instancia: str, semilla: int, instante_fin: float, V: float = 0.05,
+                    nombres_low_levels: Optional[List[str]] = None, ruta_eventos: Optional[str] = None,
+                    cada_eventos: int = 100) -> ResultadoCadena:
+    """
+    Corre una cadena de la hiper heurística hasta instante_fin. Es la función que ejecuta cada proceso:
+    lee la instancia (desde el cache binario, compartido entre procesos vía memmap) y arma sus propias low levels y matrices.
+
+    Args:
+        ruta_instancia (str): Archivo .txt de la instancia.
+        semilla (int): Semilla de la cadena.
+        instante_fin (float): Instante (time.time()) en que debe terminar; incluye el tiempo de lectura.
+        V (float): Parámetro V de la hiper heurística.
+        nombres_low_levels (Optional[List[str]]): Low levels a usar (todas si es None).
+        ruta_eventos (Optional[str]): Archivo del registro de eventos (.jsonl o .bin); puede incluir {semilla}.
+        cada_eventos (int): Se registra uno de cada cada_eventos eventos (las mejoras de la mejor solución siempre).
+
+    Returns:
+        ResultadoCadena: Mejor solución factible de la cadena como ids, iteraciones y matrices P y Q aprendidas.
+    """
+    instancia = read_instance(ruta_instancia)
+    registro = RegistroEventos(ruta_eventos.format(semilla=semilla), cada=cada_eventos) if ruta_eventos else None
+    hiper = HiperHeuristica(instancia=instancia, V=V, low_levels=instanciar_low_levels(nombres_low_levels),
+                            duracion=max(instante_fin - time.time(), 0), semilla=semilla, registro=registro)
+    mejor = hiper.implementar()
+    if registro is not None:
+        registro.cerrar()
+    if mejor is None:
+        return ResultadoCadena(semilla, None, (), (), hiper.iteraciones, hiper.P, hiper.Q,
+                               estadisticas=hiper.estadisticas.resumen(), cache=hiper.cache_prefijos.resumen(),
+                               perezosos=hiper.perezosos)
+    return ResultadoCadena(semilla, mejor.objective_value, tuple(mejor.id_selected_orders),
+                           tuple(mejor.id_selected_runners), hiper.iteraciones, hiper.P, hiper.Q,
+                           estadisticas=hiper.estadisticas.resumen(), cache=hiper.cache_prefijos.resumen(),
+                           perezosos=hiper.perezosos)
+
+
+class Migrante(NamedTuple):
+    """
+    Mensaje entre islas: la mejor solución de una isla como arreglos de ids y la matriz P con que la encontró.
+    """
+    isla: int
+    ids_ordenes: np.ndarray  # int32
+    ids_runners: np.ndarray  # int32
+    P: np.ndarray
+
+
+def ejecutar_isla(ruta_instancia: str, semilla: int, instante_fin: float, V: float, nombres_low_levels: Optional[List[str]],
+                  isla: int, entrada, salida, intervalo_migracion: float = 5.0, mezcla: float = 0.2,
+                  ruta_eventos: Optional[str] = None, cada_eventos: int = 100) -> ResultadoCadena:
+    """
+    Corre una isla del modelo de islas: una cadena de la hiper heurística que cada intervalo_migracion segundos
+    envía su mejor solución a la isla siguiente (salida) y revisa los migrantes que le llegaron (entrada).
+    De los migrantes recibidos se ofrece a la isla sólo el mejor (ver HiperHeuristica.recibir_migrante).
+
+    Args:
+        ruta_instancia (str): Archivo .txt de la instancia.
+        semilla (int): Semilla de la isla.
+        instante_fin (float): Instante (time.time()) en que debe terminar.
+        V (float): Parámetro V de la hiper heurística.
+        nombres_low_levels (Optional[List[str]]): Low levels a usar (todas si es None).
+        isla (int): Número de la isla.
+        entrada: Cola (multiprocessing) de donde se leen los migrantes para esta isla.
+        salida: Cola de la isla vecina, a donde se envían los migrantes.
+        intervalo_migracion (float): Segundos entre migraciones.
+        mezcla (float): Peso de las filas de P del migrante al adoptarlo.
+        ruta_eventos (Optional[str]): Archivo del registro de eventos; puede incluir {semilla}.
+        cada_eventos (int): Se registra uno de cada cada_eventos eventos.
+
+    Returns:
+        ResultadoCadena: Igual que ejecutar_cadena, con la cantidad de migrantes adoptados.
+    """
+    instancia = read_instance(ruta_instancia)
+    registro = RegistroEventos(ruta_eventos.format(semilla=semilla), cada=cada_eventos) if ruta_eventos else None
+    hiper = HiperHeuristica(instancia=instancia, V=V, low_levels=instanciar_low_levels(nombres_low_levels),
+                            duracion=max(instante_fin - time.time(), 0), semilla=semilla, registro=registro)
+
+    def migrar(hiper: HiperHeuristica):
+        enviada = hiper.mejor_factible or hiper.mejor_sol
+        salida.put(Migrante(isla, np.array(enviada.id_selected_orders, dtype=np.int32),
+                            np.array(enviada.id_selected_runners, dtype=np.int32), hiper.P))
+        recibidos = []
+        while True:
+            try:
+                recibidos.append(entrada.get_nowait())
+            except queue.Empty:
+                break
+        if not recibidos:
+            return
+        soluciones = [(solucion_desde_ids(instancia, m.ids_ordenes.tolist(), m.ids_runners.tolist()), m.P) for m in recibidos]
+        mejor, P_mejor = max(soluciones, key=lambda par: hiper.valor_penalizado(par[0]))
+        hiper.recibir_migrante(mejor, P_mejor, mezcla)
+
+    mejor = hiper.implementar(migrar=migrar, intervalo_migracion=intervalo_migracion)
+    if registro is not None:
+        registro.cerrar()
+    if mejor is None:
+        return ResultadoCadena(semilla, None, (), (), hiper.iteraciones, hiper.P, hiper.Q, hiper.migrantes_adoptados,
+                               hiper.estadisticas.resumen(), hiper.cache_prefijos.resumen(), hiper.perezosos)
+    return ResultadoCadena(semilla, mejor.objective_value, tuple(mejor.id_selected_orders), tuple(mejor.id_selected_runners),
+                           hiper.iteraciones, hiper.P, hiper.Q, hiper.migrantes_adoptados, hiper.estadisticas.resumen(),
+                           hiper.cache_prefijos.resumen(), hiper.perezosos)
+
+
+def solucion_desde_ids(instancia: Instance, ids_ordenes: Tuple[int, ...], ids_runners: Tuple[int, ...]) -> Solucion:
+    """
+    Reconstruye una Solucion a partir de los ids de sus órdenes y corredores.
+    """
+    return Solucion([instancia.orders[o] for o in ids_ordenes], [instancia.runners[a] for a in ids_runners], instancia)
+
+
+def resolver_en_paralelo(ruta_instancia: str, num_cadenas: Optional[int] = None, duracion: float = 600, V: float = 0.05,
+                         semilla: int = 0, procesos: Optional[int] = None, nombres_low_levels: Optional[List[str]] = None,
+                         ruta_eventos: Optional[str] = None, cada_eventos: int = 100) -> Tuple[Optional[Solucion], List[ResultadoCadena]]:
+    """
+    Corre num_cadenas cadenas independientes de la hiper heurística en un pool de procesos, cada una con
+    semilla semilla + k y sus propias matrices P/Q, y retorna la mejor solución factible entre todas.
+    Todas las cadenas terminan en el mismo instante (ahora + duracion); si hay más cadenas que procesos,
+    las que esperan turno corren menos tiempo.
+
+    Args:
+        ruta_instancia (str): Archivo .txt de la instancia.
+        num_cadenas (Optional[int]): Número de cadenas (por defecto, una por CPU).
+        duracion (float): Presupuesto de tiempo total en segundos.
+        V (float): Parámetro V de la hiper heurística.
+        semilla (int): Semilla base.
+        procesos (Optional[int]): Tamaño del pool (por defecto, num_cadenas). Con 1 se corre en el proceso actual.
+        nombres_low_levels (Optional[List[str]]): Low levels a usar (todas si es None).
+        ruta_eventos (Optional[str]): Archivo del registro de eventos de cada cadena, con {semilla} (p. ej. "eventos_{semilla}.jsonl").
+        cada_eventos (int): Se registra uno de cada cada_eventos eventos.
+
+    Returns:
+        Tuple[Optional[Solucion], List[ResultadoCadena]]: Mejor solución factible (None si ninguna cadena encontró una)
+            y el resultado de cada cadena.
+    """
+    num_cadenas = num_cadenas or os.cpu_count() or 1
+    procesos = procesos or num_cadenas
+    instante_fin = time.time() + duracion
+    argumentos = [(ruta_instancia, semilla + k, instante_fin, V, nombres_low_levels, ruta_eventos, cada_eventos)
+                  for k in range(num_cadenas)]
+
+    if procesos == 1:
+        resultados = [ejecutar_cadena(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(ejecutar_cadena, *zip(*argumentos)))
+
+    return _mejor_resultado(ruta_instancia, resultados), resultados
+
+
+def resolver_en_islas(ruta_instancia: str, num_islas: Optional[int] = None, duracion: float = 600, V: float = 0.05,
+                      semilla: int = 0, intervalo_migracion: float = 5.0, mezcla: float = 0.2,
+                      nombres_low_levels: Optional[List[str]] = None, ruta_eventos: Optional[str] = None,
+                      cada_eventos: int = 100) -> Tuple[Optional[Solucion], List[ResultadoCadena]]:
+    """
+    Modelo de islas: num_islas cadenas en procesos paralelos, conectadas en anillo (la isla k envía a la k + 1),
+    que intercambian su mejor solución cada intervalo_migracion segundos. Cada isla mantiene su candidata y sus
+    matrices; al adoptar un migrante mezcla sus filas de P con las de la isla de origen.
+
+    Args:
+        ruta_instancia (str): Archivo .txt de la instancia.
+        num_islas (Optional[int]): Número de islas (por defecto, una por CPU). Todas corren a la vez.
+        duracion (float): Presupuesto de tiempo total en segundos.
+        V (float): Parámetro V de la hiper heurística.
+        semilla (int): Semilla base (la isla k usa semilla + k).
+        intervalo_migracion (float): Segundos entre migraciones.
+        mezcla (float): Peso de las filas de P del migrante al adoptarlo.
+        nombres_low_levels (Optional[List[str]]): Low levels a usar (todas si es None).
+        ruta_eventos (Optional[str]): Archivo del registro de eventos de cada isla, con {semilla}.
+        cada_eventos (int): Se registra uno de cada cada_eventos eventos.
+
+    Returns:
+        Tuple[Optional[Solucion], List[ResultadoCadena]]: Mejor solución factible (None si ninguna isla encontró una)
+            y el resultado de cada isla.
+    """
+    num_islas = num_islas or os.cpu_count() or 1
+    instante_fin = time.time() + duracion
+    with Manager() as manager:
+        colas = [manager.Queue() for _ in range(num_islas)]
+        with ProcessPoolExecutor(max_workers=num_islas) as pool:
+            futuros = [pool.submit(ejecutar_isla, ruta_instancia, semilla + k, instante_fin, V, nombres_low_levels,
+                                   k, colas[k], colas[(k + 1) % num_islas], intervalo_migracion, mezcla,
+                                   ruta_eventos, cada_eventos)
+                       for k in range(num_islas)]
+            resultados = [futuro.result() for futuro in futuros]
+    return _mejor_resultado(ruta_instancia, resultados), resultados
+
+
+def _mejor_resultado(ruta_instancia: str, resultados: List[ResultadoCadena]) -> Optional[Solucion]:
+    """
+    Reconstruye la mejor solución factible entre los resultados de varias cadenas o islas.
+    """
+    factibles = [r for r in resultados if r.objetivo is not None]
+    if not factibles:
+        return None
+    mejor = max(factibles, key=lambda r: r.objetivo)
+    return solucion_desde_ids(read_instance(ruta_instancia), mejor.ids_ordenes, mejor.ids_runners)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hiper heurística en paralelo: cadenas independientes o modelo de islas.")
+    parser.add_argument("instancia", help="Archivo .txt de la instancia.")
+    parser.add_argument("--cadenas", type=int, default=None, help="Número de cadenas o islas (por defecto, una por CPU).")
+    parser.add_argument("--procesos", type=int, default=None, help="Tamaño del pool de procesos (sólo cadenas independientes).")
+    parser.add_argument("--islas", action="store_true", help="Usa el modelo de islas con migración en vez de cadenas independientes.")
+    parser.add_argument("--intervalo", type=float, default=5.0, help="Segundos entre migraciones (modelo de islas).")
+    parser.add_argument("--mezcla", type=float, default=0.2, help="Peso de la matriz P del migrante (modelo de islas).")
+    parser.add_argument("--segundos", type=float, default=600)
+    parser.add_argument("--V", type=float, default=0.05)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--estadisticas", help="Archivo JSON donde guardar las estadísticas por low level de cada cadena "
+                                                   "(incluye los atributos perezosos calculados y evitados).")
+    parser.add_argument("--eventos", help="Registro de eventos de cada cadena (.jsonl o .bin), con {semilla}; p. ej. eventos_{semilla}.jsonl.")
+    parser.add_argument("--cada-eventos", type=int, default=100, help="Se registra uno de cada N eventos.")
+    args = parser.parse_args()
+
+    if args.islas:
+        mejor, resultados = resolver_en_islas(args.instancia, num_islas=args.cadenas, duracion=args.segundos, V=args.V,
+                                              semilla=args.semilla, intervalo_migracion=args.intervalo, mezcla=args.mezcla,
+                                              ruta_eventos=args.eventos, cada_eventos=args.cada_eventos)
+    else:
+        mejor, resultados = resolver_en_paralelo(args.instancia, num_cadenas=args.cadenas, duracion=args.segundos,
+                                                 V=args.V, semilla=args.semilla, procesos=args.procesos,
+                                                 ruta_eventos=args.eventos, cada_eventos=args.cada_eventos)
+    for r in resultados:
+        objetivo = f"{r.objetivo:.4f}" if r.objetivo is not None else "-"
+        print(f"semilla = {r.semilla:4d}, iteraciones = {r.iteraciones:8d}, migrantes adoptados = {r.migrantes_adoptados:3d}, "
+              f"aciertos cache = {r.cache['tasa_aciertos']:.1%}, objetivo = {objetivo}")
+    if args.estadisticas:
+        with open(args.estadisticas, 'w', encoding='utf-8') as f:
+            json.dump([{'semilla': r.semilla, 'estadisticas': r.estadisticas, 'cache': r.cache, 'perezosos': r.perezosos} for r in resultados],
+                      f, indent=2, ensure_ascii=False)
+    if mejor is None:
+        print("Ninguna cadena encontró una solución factible.")
+    else:
+        print(f"Mejor: objetivo = {mejor.objective_value:.4f}, órdenes = {mejor.num_orders}, corredores = {mejor.num_runners}")
+
+
+if __name__ == "__main__":
+    main()
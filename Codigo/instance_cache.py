@@ -0,0 +1,124 @@
+import argparse
+import hashlib
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Formato del archivo binario (todo en int32):
+#   cabecera: MAGIA, VERSION, tamaño del .txt, o, i, a, lb, ub, nnz órdenes, nnz corredores
+#   órdenes: indptr (o + 1), ítems (nnz), cantidades (nnz)
+#   corredores: indptr (a + 1), ítems (nnz), cantidades (nnz)
+MAGIA = 0x4D4C4956  # "MLIV"
+VERSION = 1
+LARGO_CABECERA = 10
+DIRECTORIO_CACHE = ".cache"
+
+
+def huella_archivo(filepath: str) -> str:
+    """
+    Calcula el hash del contenido de un archivo de instancia.
+
+    Args:
+        filepath (str): Ruta al archivo .txt de la instancia.
+
+    Returns:
+        str: Hash blake2b (16 caracteres hexadecimales) del contenido.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    with open(filepath, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def ruta_cache(filepath: str) -> str:
+    """
+    Ruta del archivo binario asociado a una instancia, identificado por el hash y el tamaño del .txt.
+    Se guarda en un directorio .cache junto al archivo original.
+
+    Args:
+        filepath (str): Ruta al archivo .txt de la instancia.
+
+    Returns:
+        str: Ruta del archivo .bin (puede no existir todavía).
+    """
+    directorio, nombre = os.path.split(os.path.abspath(filepath))
+    tamano = os.path.getsize(filepath)
+    return os.path.join(directorio, DIRECTORIO_CACHE, f"{nombre}.{tamano}.{huella_archivo(filepath)}.bin")
+
+
+def guardar_cache(ruta: str, tamano: int, o: int, i: int, a: int, lb: int, ub: int,
+                  ordenes: Tuple[np.ndarray, ...], corredores: Tuple[np.ndarray, ...]):
+    """
+    Escribe los arreglos CSR de una instancia en un archivo binario. La escritura es atómica
+    (archivo temporal + rename) para que varios procesos puedan construir el mismo cache a la vez.
+
+    Args:
+        ruta (str): Ruta del archivo .bin.
+        tamano (int): Tamaño en bytes del .txt original.
+        o, i, a, lb, ub (int): Dimensiones y límites de la instancia.
+        ordenes (Tuple[np.ndarray, ...]): (indptr, items, cantidades) de las órdenes.
+        corredores (Tuple[np.ndarray, ...]): (indptr, items, cantidades) de los corredores.
+    """
+    cabecera = np.array([MAGIA, VERSION, tamano, o, i, a, lb, ub, len(ordenes[1]), len(corredores[1])], dtype=np.int32)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as f:
+        for arreglo in (cabecera, *ordenes, *corredores):
+            np.ascontiguousarray(arreglo, dtype=np.int32).tofile(f)
+    os.replace(temporal, ruta)
+
+
+def cargar_cache(ruta: str, tamano: Optional[int] = None):
+    """
+    Carga los arreglos CSR de una instancia desde su archivo binario mediante numpy.memmap, de modo que
+    no se copian datos y los procesos que leen la misma instancia comparten las páginas en memoria.
+
+    Args:
+        ruta (str): Ruta del archivo .bin.
+        tamano (Optional[int]): Tamaño esperado del .txt original, para validar la cabecera.
+
+    Returns:
+        Tuple: (o, i, a, lb, ub, arreglos_ordenes, arreglos_corredores), igual que instance_reader.leer_arreglos.
+
+    Raises:
+        ValueError: Si el archivo no tiene el formato o la versión esperada.
+    """
+    datos = np.memmap(ruta, dtype=np.int32, mode='r')
+    if len(datos) < LARGO_CABECERA or datos[0] != MAGIA or datos[1] != VERSION:
+        raise ValueError(f"Cache de instancia inválido: {ruta}")
+    _, _, tamano_txt, o, i, a, lb, ub, nnz_ordenes, nnz_corredores = (int(v) for v in datos[:LARGO_CABECERA])
+    if tamano is not None and tamano != tamano_txt:
+        raise ValueError(f"Cache de instancia desactualizado: {ruta}")
+
+    posicion = LARGO_CABECERA
+    arreglos = []
+    for largo in (o + 1, nnz_ordenes, nnz_ordenes, a + 1, nnz_corredores, nnz_corredores):
+        arreglos.append(datos[posicion:posicion + largo])
+        posicion += largo
+    if posicion != len(datos):
+        raise ValueError(f"Cache de instancia truncado: {ruta}")
+    return o, i, a, lb, ub, tuple(arreglos[:3]), tuple(arreglos[3:])
+
+
+def main():
+    """
+    Precompila el cache binario de todas las instancias .txt de uno o más directorios.
+    """
+    from instance_reader import construir_cache
+
+    parser = argparse.ArgumentParser(description="Precompila el cache binario de instancias.")
+    parser.add_argument("rutas", nargs="+", help="Directorios o archivos .txt de instancias.")
+    parser.add_argument("--forzar", action="store_true", help="Reescribe el cache aunque ya exista.")
+    args = parser.parse_args()
+
+    for ruta in args.rutas:
+        archivos = ([os.path.join(ruta, nombre) for nombre in sorted(os.listdir(ruta)) if nombre.endswith(".txt")]
+                    if os.path.isdir(ruta) else [ruta])
+        for archivo in archivos:
+            print(f"{archivo} -> {construir_cache(archivo, forzar=args.forzar)}")
+
+
+if __name__ == "__main__":
+    main()
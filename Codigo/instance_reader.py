@@ -1,8 +1,12 @@
-from typing import List
+import os
+from typing import List, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
 from data_structures import Order, Runner
-from Instance import Instance
+from Instance import Instance, filas_por_matriz
+from instance_cache import cargar_cache, guardar_cache, ruta_cache
 
-def read_instance(filepath: str) -> Instance:
+def read_instance(filepath: str, usar_cache: bool = True) -> Instance:
     """
     Lee un archivo de instancia y construye una estructura de datos que representa el problema.
 
@@ -12,6 +16,142 @@ def read_instance(filepath: str) -> Instance:
         - Siguientes a líneas: cada una representa un corredor con l (ítems disponibles) y l pares (ítem, cantidad)
         - Última línea: LB y UB (límites de unidades permitidas en la wave)
 
+    El archivo se tokeniza completo en un único arreglo de enteros y las órdenes y corredores se
+    recortan según el largo indicado al inicio de cada fila. Con usar_cache, el resultado se guarda
+    en un archivo binario (ver instance_cache) que se reutiliza, vía memmap, mientras el .txt no cambie.
+
+    Args:
+        filepath (str): Ruta al archivo .txt que contiene la instancia.
+        usar_cache (bool): Si se lee y escribe el cache binario de la instancia.
+
+    Returns:
+        Instance: Objeto que representa toda la instancia del problema.
+    """
+    if usar_cache:
+        return instancia_desde_arreglos(*leer_arreglos_con_cache(filepath))
+    return instancia_desde_arreglos(*leer_arreglos(filepath))
+
+
+def leer_arreglos_con_cache(filepath: str):
+    """
+    Igual que leer_arreglos, pero usando el cache binario si existe y creándolo si no.
+    Si el cache no se puede escribir (p. ej. directorio de solo lectura) se usa la lectura del .txt.
+    """
+    ruta = ruta_cache(filepath)
+    tamano = os.path.getsize(filepath)
+    if os.path.exists(ruta):
+        try:
+            return cargar_cache(ruta, tamano)
+        except ValueError:
+            pass  # Cache corrupto o de otra versión: se reconstruye
+
+    arreglos = leer_arreglos(filepath)
+    try:
+        guardar_cache(ruta, tamano, *arreglos)
+    except OSError:
+        pass
+    return arreglos
+
+
+def construir_cache(filepath: str, forzar: bool = False) -> str:
+    """
+    Construye el cache binario de una instancia si no existe (o siempre, con forzar).
+
+    Args:
+        filepath (str): Ruta al archivo .txt que contiene la instancia.
+        forzar (bool): Reescribe el cache aunque ya exista.
+
+    Returns:
+        str: Ruta del archivo de cache.
+    """
+    ruta = ruta_cache(filepath)
+    if forzar or not os.path.exists(ruta):
+        guardar_cache(ruta, os.path.getsize(filepath), *leer_arreglos(filepath))
+    return ruta
+
+
+def leer_arreglos(filepath: str) -> Tuple[int, int, int, int, int, Tuple[np.ndarray, ...], Tuple[np.ndarray, ...]]:
+    """
+    Lee un archivo de instancia como arreglos CSR (punteros de fila, ítems y cantidades).
+
+    Args:
+        filepath (str): Ruta al archivo .txt que contiene la instancia.
+
+    Returns:
+        Tuple: (o, i, a, lb, ub, arreglos_ordenes, arreglos_corredores), donde cada grupo de arreglos
+            es (indptr, items, cantidades).
+    """
+    datos = np.fromfile(filepath, dtype=np.int64, sep=' ')
+    valores = datos.tolist()
+    o, i, a = valores[:3]
+
+    ordenes, inicio = _recortar_filas(datos, valores, 3, o)
+    corredores, inicio = _recortar_filas(datos, valores, inicio, a)
+
+    if len(datos) - inicio != 2:
+        raise ValueError(f"Formato inválido en {filepath}: se esperaban LB y UB al final del archivo")
+    lb, ub = valores[-2:]
+    return o, i, a, lb, ub, ordenes, corredores
+
+
+def _recortar_filas(datos: np.ndarray, valores: List[int], inicio: int, num_filas: int) -> Tuple[Tuple[np.ndarray, ...], int]:
+    """
+    Recorta num_filas filas con prefijo de largo (k, seguido de k pares ítem-cantidad) desde la posición inicio.
+    valores es datos como lista, para leer los prefijos sin pasar por escalares de NumPy.
+
+    Returns:
+        Tuple: ((indptr, items, cantidades), posición siguiente a la última fila).
+    """
+    # Los largos de cada fila dependen de la anterior, por lo que sólo este recorrido es secuencial
+    comienzos_lista = []
+    largos_lista = []
+    posicion = inicio
+    for _ in range(num_filas):
+        k = valores[posicion]
+        comienzos_lista.append(posicion + 1)
+        largos_lista.append(k)
+        posicion += 1 + 2 * k
+    comienzos = np.array(comienzos_lista, dtype=np.int64)
+    largos = np.array(largos_lista, dtype=np.int64)
+
+    indptr = np.zeros(num_filas + 1, dtype=np.int64)
+    np.cumsum(largos, out=indptr[1:])
+    # Posición en datos de cada par: comienzo de su fila + 2 * (número del par dentro de la fila)
+    desplazamientos = np.repeat(comienzos - 2 * indptr[:-1], largos)
+    posiciones = desplazamientos + 2 * np.arange(indptr[-1], dtype=np.int64)
+    return (indptr, datos[posiciones], datos[posiciones + 1]), posicion
+
+
+def instancia_desde_arreglos(o: int, i: int, a: int, lb: int, ub: int,
+                             ordenes: Tuple[np.ndarray, ...], corredores: Tuple[np.ndarray, ...]) -> Instance:
+    """
+    Construye la Instance a partir de los arreglos CSR de órdenes y corredores.
+
+    Args:
+        o (int): Número de órdenes.
+        i (int): Número de ítems.
+        a (int): Número de corredores.
+        lb (int): Límite inferior de unidades.
+        ub (int): Límite superior de unidades.
+        ordenes (Tuple[np.ndarray, ...]): (indptr, items, cantidades) de las órdenes.
+        corredores (Tuple[np.ndarray, ...]): (indptr, items, cantidades) de los corredores.
+
+    Returns:
+        Instance: Objeto que representa toda la instancia del problema.
+    """
+    orders_matrix = csr_matrix((ordenes[2], ordenes[1], ordenes[0]), shape=(o, i))
+    runners_matrix = csr_matrix((corredores[2], corredores[1], corredores[0]), shape=(a, i))
+    # Las órdenes y corredores son tramos de los arreglos de las matrices, sin diccionarios propios
+    orders: List[Order] = filas_por_matriz(Order, orders_matrix)
+    runners: List[Runner] = filas_por_matriz(Runner, runners_matrix)
+    return Instance(orders=orders, runners=runners, num_items=i, lb=lb, ub=ub,
+                    orders_matrix=orders_matrix, runners_matrix=runners_matrix)
+
+
+def read_instance_lineas(filepath: str) -> Instance:
+    """
+    Lector original línea por línea. Se mantiene como referencia para comparar resultados y tiempos con read_instance.
+
     Args:
         filepath (str): Ruta al archivo .txt que contiene la instancia.
 
@@ -0,0 +1,265 @@
+import json
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class EstadisticasLowLevels:
+    """
+    Contadores por low level de una corrida de la hiper heurística: llamadas, tiempo en implementacion,
+    veces que retornó la solución de entrada sin cambios, mejoras y transiciones de factibilidad.
+    Los tiempos individuales se guardan en una muestra acotada (reservorio) para estimar percentiles
+    sin que la memoria crezca con el número de llamadas.
+
+    Atributos:
+        nombres (List[str]): Nombre de cada low level (índice = id).
+        llamadas (List[int]): Llamadas a implementacion.
+        tiempo_total (List[float]): Segundos acumulados en implementacion.
+        sin_cambio (List[int]): Llamadas que retornaron la misma solución que recibieron.
+        mejoras_locales (List[int]): Llamadas cuyo resultado tiene mejor valor penalizado que la entrada.
+        mejoras_candidata (List[int]): Veces que la low level formó parte de una secuencia aceptada como candidata.
+        mejoras_mejor (List[int]): Veces que la low level formó parte de una secuencia que mejoró la mejor solución.
+        a_factible (List[int]): Llamadas que pasaron de una solución infactible a una factible.
+        a_infactible (List[int]): Llamadas que pasaron de una solución factible a una infactible.
+    """
+    def __init__(self, nombres: List[str], tamano_muestra: int = 4096):
+        n = len(nombres)
+        self.nombres = list(nombres)
+        self.tamano_muestra = tamano_muestra
+        self.llamadas = [0] * n
+        self.tiempo_total = [0.0] * n
+        self.sin_cambio = [0] * n
+        self.mejoras_locales = [0] * n
+        self.mejoras_candidata = [0] * n
+        self.mejoras_mejor = [0] * n
+        self.a_factible = [0] * n
+        self.a_infactible = [0] * n
+        self.muestras = [[] for _ in range(n)]  # Reservorio de tiempos por low level
+        self._azar = random.Random(0)  # Generador propio, para no alterar la secuencia aleatoria de la búsqueda
+
+    def registrar_llamada(self, id_low_level: int, segundos: float, entrada, salida, mejora: bool):
+        """
+        Registra una llamada a implementacion.
+
+        Args:
+            id_low_level (int): Id de la low level.
+            segundos (float): Duración de la llamada.
+            entrada (Solucion): Solución recibida.
+            salida (Solucion): Solución retornada.
+            mejora (bool): Si la salida tiene mejor valor penalizado que la entrada.
+        """
+        self.llamadas[id_low_level] += 1
+        self.tiempo_total[id_low_level] += segundos
+        if salida is entrada:
+            self.sin_cambio[id_low_level] += 1
+        if mejora:
+            self.mejoras_locales[id_low_level] += 1
+        if salida.is_factible != entrada.is_factible:
+            if salida.is_factible:
+                self.a_factible[id_low_level] += 1
+            else:
+                self.a_infactible[id_low_level] += 1
+
+        muestra = self.muestras[id_low_level]
+        if len(muestra) < self.tamano_muestra:
+            muestra.append(segundos)
+        else:
+            j = self._azar.randrange(self.llamadas[id_low_level])
+            if j < self.tamano_muestra:
+                muestra[j] = segundos
+
+    def registrar_aceptacion(self, secuencia: List[int], mejora_candidata: bool, mejora_mejor: bool):
+        """
+        Acredita a cada low level de una secuencia aplicada si la secuencia fue aceptada como candidata
+        y/o si mejoró la mejor solución.
+        """
+        for id_low_level in secuencia:
+            if mejora_candidata:
+                self.mejoras_candidata[id_low_level] += 1
+            if mejora_mejor:
+                self.mejoras_mejor[id_low_level] += 1
+
+    def resumen(self) -> Dict[str, Dict[str, float]]:
+        """
+        Resumen por low level, con el tiempo medio y los percentiles 50, 90 y 99 (en segundos).
+
+        Returns:
+            Dict[str, Dict[str, float]]: nombre -> contadores y tiempos.
+        """
+        resumen = {}
+        for i, nombre in enumerate(self.nombres):
+            llamadas = self.llamadas[i]
+            p50, p90, p99 = np.percentile(self.muestras[i], [50, 90, 99]).tolist() if self.muestras[i] else (0.0, 0.0, 0.0)
+            resumen[nombre] = {
+                'llamadas': llamadas,
+                'tiempo_total': self.tiempo_total[i],
+                'tiempo_medio': self.tiempo_total[i] / llamadas if llamadas else 0.0,
+                'p50': p50, 'p90': p90, 'p99': p99,
+                'sin_cambio': self.sin_cambio[i],
+                'mejoras_locales': self.mejoras_locales[i],
+                'mejoras_candidata': self.mejoras_candidata[i],
+                'mejoras_mejor': self.mejoras_mejor[i],
+                'a_factible': self.a_factible[i],
+                'a_infactible': self.a_infactible[i],
+            }
+        return resumen
+
+    def guardar(self, ruta: str):
+        """
+        Guarda el resumen en un archivo JSON.
+        """
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.resumen(), f, indent=2, ensure_ascii=False)
+
+    def __str__(self):
+        """
+        Tabla con el resumen, ordenada por tiempo total (las low levels que más tiempo consumen primero).
+        """
+        filas = sorted(self.resumen().items(), key=lambda par: -par[1]['tiempo_total'])
+        lineas = [f"{'low level':28s} {'llamadas':>9s} {'total [s]':>10s} {'p50 [ms]':>9s} {'p99 [ms]':>9s} "
+                  f"{'sin cambio':>10s} {'mejora':>8s} {'cand.':>7s} {'mejor':>6s} {'->fact':>7s} {'->infact':>8s}"]
+        for nombre, r in filas:
+            lineas.append(f"{nombre:28s} {r['llamadas']:9d} {r['tiempo_total']:10.2f} {r['p50'] * 1000:9.3f} {r['p99'] * 1000:9.3f} "
+                          f"{r['sin_cambio']:10d} {r['mejoras_locales']:8d} {r['mejoras_candidata']:7d} {r['mejoras_mejor']:6d} "
+                          f"{r['a_factible']:7d} {r['a_infactible']:8d}")
+        return "\n".join(lineas)
+
+
+# Registro binario de eventos: secuencia de registros de tamaño fijo con este dtype. Las secuencias
+# de low levels se guardan hasta LARGO_SECUENCIA_BINARIO ids; largo_secuencia guarda el largo real.
+LARGO_SECUENCIA_BINARIO = 16
+DTYPE_EVENTO = np.dtype([
+    ('iteracion', np.int64),
+    ('instante', np.float64),
+    ('valor_candidata', np.float64),
+    ('valor_mejor', np.float64),
+    ('factible_candidata', np.bool_),
+    ('factible_mejor', np.bool_),
+    ('largo_secuencia', np.int16),
+    ('secuencia', np.int16, (LARGO_SECUENCIA_BINARIO,)),
+])
+
+
+class RegistroEventos:
+    """
+    Buffer circular de eventos de la hiper heurística (iteración, secuencia aplicada, valor y factibilidad de
+    la candidata y de la mejor solución, instante). Sólo se guarda uno de cada `cada` eventos, salvo los
+    forzados (p. ej. mejoras de la mejor solución), de modo que registrar cuesta un contador en la mayoría
+    de las iteraciones.
+
+    Si se da una ruta, el buffer se escribe por lotes cuando se llena (y al llamar vaciar()), en JSONL o,
+    si la ruta termina en .bin, en registros binarios DTYPE_EVENTO. Sin ruta, el buffer conserva los
+    últimos `capacidad` eventos, que se consultan con eventos().
+    """
+    def __init__(self, ruta: Optional[str] = None, capacidad: int = 1024, cada: int = 1, imprimir: bool = False):
+        """
+        Args:
+            ruta (Optional[str]): Archivo .jsonl o .bin de salida (se sobrescribe), o None para mantener sólo el buffer.
+            capacidad (int): Eventos en el buffer.
+            cada (int): Se registra uno de cada `cada` eventos no forzados.
+            imprimir (bool): Si se imprime el último evento de cada lote escrito (progreso por consola).
+        """
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self.cada = max(1, cada)
+        self.imprimir = imprimir
+        self.buffer = np.zeros(capacidad, dtype=DTYPE_EVENTO)
+        self.secuencias: List[Optional[tuple]] = [None] * capacidad  # Secuencias completas, para el JSONL
+        self.posicion = 0  # Próxima posición a escribir en el buffer
+        self.llenos = 0  # Eventos válidos en el buffer
+        self.pendientes = 0  # Eventos registrados desde el último vaciado
+        self.ofrecidos = 0  # Eventos recibidos (registrados o no)
+        self.registrados = 0
+        self.binario = ruta is not None and ruta.endswith('.bin')
+        self.archivo = open(ruta, 'wb' if self.binario else 'w', encoding=None if self.binario else 'utf-8') if ruta else None
+
+    def registrar(self, iteracion: int, secuencia: Sequence[int], valor_candidata: float, valor_mejor: float,
+                  factible_candidata: bool, factible_mejor: bool, forzar: bool = False):
+        """
+        Ofrece un evento al registro; se guarda si le toca según el muestreo o si es forzado.
+        """
+        self.ofrecidos += 1
+        if not forzar and self.ofrecidos % self.cada:
+            return
+        evento = self.buffer[self.posicion]
+        evento['iteracion'] = iteracion
+        evento['instante'] = time.time()
+        evento['valor_candidata'] = valor_candidata
+        evento['valor_mejor'] = valor_mejor
+        evento['factible_candidata'] = factible_candidata
+        evento['factible_mejor'] = factible_mejor
+        largo = len(secuencia)
+        evento['largo_secuencia'] = largo
+        evento['secuencia'][:min(largo, LARGO_SECUENCIA_BINARIO)] = secuencia[:LARGO_SECUENCIA_BINARIO]
+        evento['secuencia'][largo:] = -1
+        self.secuencias[self.posicion] = tuple(secuencia)
+        self.registrados += 1
+        self.posicion = (self.posicion + 1) % self.capacidad
+        self.llenos = min(self.llenos + 1, self.capacidad)
+        self.pendientes += 1
+        if self.pendientes == self.capacidad:
+            self.vaciar()
+
+    def eventos(self) -> List[Dict]:
+        """
+        Eventos del buffer, del más antiguo al más reciente.
+        """
+        inicio = (self.posicion - self.llenos) % self.capacidad
+        indices = [(inicio + k) % self.capacidad for k in range(self.llenos)]
+        return [self._como_diccionario(i) for i in indices]
+
+    def vaciar(self):
+        """
+        Escribe en el archivo los eventos registrados desde el último vaciado y los saca del buffer.
+        Sin archivo, el buffer se conserva (sólo se imprime el progreso, si corresponde).
+        """
+        if self.pendientes == 0:
+            return
+        self.pendientes = 0
+        if self.archivo is not None:
+            if self.binario:
+                inicio = (self.posicion - self.llenos) % self.capacidad
+                np.roll(self.buffer, -inicio)[:self.llenos].tofile(self.archivo)
+            else:
+                self.archivo.write(''.join(json.dumps(evento) + '\n' for evento in self.eventos()))
+            self.archivo.flush()
+        if self.imprimir:
+            ultimo = self._como_diccionario((self.posicion - 1) % self.capacidad)
+            print(f"Conteo = {ultimo['iteracion']}, secuencia = {list(ultimo['secuencia'])}, "
+                  f"s_c = {ultimo['valor_candidata']:.2f} {ultimo['factible_candidata']}, s* = {ultimo['valor_mejor']:.2f} {ultimo['factible_mejor']}")
+        if self.archivo is not None:
+            self.llenos = 0
+
+    def cerrar(self):
+        """
+        Vacía el buffer y cierra el archivo.
+        """
+        self.vaciar()
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+    def _como_diccionario(self, i: int) -> Dict:
+        evento = self.buffer[i]
+        return {'iteracion': int(evento['iteracion']), 'instante': float(evento['instante']),
+                'secuencia': list(self.secuencias[i]),
+                'valor_candidata': float(evento['valor_candidata']), 'valor_mejor': float(evento['valor_mejor']),
+                'factible_candidata': bool(evento['factible_candidata']), 'factible_mejor': bool(evento['factible_mejor'])}
+
+
+def leer_eventos(ruta: str):
+    """
+    Lee un registro de eventos escrito por RegistroEventos.
+
+    Args:
+        ruta (str): Archivo .jsonl o .bin.
+
+    Returns:
+        List[Dict] para JSONL, o np.ndarray con dtype DTYPE_EVENTO para el formato binario.
+    """
+    if ruta.endswith('.bin'):
+        return np.fromfile(ruta, dtype=DTYPE_EVENTO)
+    with open(ruta, encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
@@ -6,10 +6,10 @@ def main():
     Función principal que carga una instancia del problema, ejecuta la heurística golosa
     y muestra los resultados por consola.
     """
-    instance = read_instance("instances/instance_0001.txt")
+    instance = read_instance("datasets/a/instance_0001.txt")
     orders, runners = greedy_wave_selection(instance)
 
-    total_units = sum(order.total_units() for order in orders)
+    total_units = sum(order.total_units for order in orders)
     num_runners = len(runners)
 
     if num_runners == 0:
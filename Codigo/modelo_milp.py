@@ -0,0 +1,257 @@
+import time
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix, hstack, vstack
+
+from Instance import Instance
+
+BACKENDS = ("gurobi", "highs")
+
+
+class ModeloMILP:
+    """
+    Modelo MILP de la wave expresado con matrices dispersas, independiente del solver. Las variables son
+    binarias: primero una por orden (x) y luego una por corredor (y). Cada fila de la matriz es una restricción
+    cota_inf <= fila @ [x, y] <= cota_sup:
+        - una fila de stock por ítem pedido: demanda de las órdenes - stock de los corredores <= 0,
+        - la fila de unidades: lb <= unidades de las órdenes <= ub,
+        - la fila de corredores: mínimo <= cantidad de corredores <= máximo.
+
+    Atributos:
+        instancia (Instance): Instancia del problema.
+        num_ordenes (int): Cantidad de variables de órdenes.
+        num_corredores (int): Cantidad de variables de corredores.
+        matriz (csr_matrix): Coeficientes de las restricciones.
+        cota_inf (np.ndarray): Cota inferior de cada fila (-inf si no tiene).
+        cota_sup (np.ndarray): Cota superior de cada fila.
+        fila_unidades (int): Índice de la fila de unidades.
+        fila_corredores (int): Índice de la fila de corredores.
+    """
+    def __init__(self, instancia: Instance):
+        self.instancia = instancia
+        self.num_ordenes = len(instancia.orders)
+        self.num_corredores = len(instancia.runners)
+        # Sólo los ítems que alguna orden pide generan restricción de stock
+        items = np.flatnonzero(np.diff(instancia.items_orders.indptr))
+        stock = hstack([instancia.items_orders[items], -instancia.items_runners[items]])
+        unidades = np.concatenate([instancia.orders_units, np.zeros(self.num_corredores)])
+        corredores = np.concatenate([np.zeros(self.num_ordenes), np.ones(self.num_corredores)])
+        self.matriz = vstack([stock, csr_matrix(unidades), csr_matrix(corredores)], format="csr")
+        self.fila_unidades = len(items)
+        self.fila_corredores = len(items) + 1
+        self.cota_inf = np.concatenate([np.full(len(items), -np.inf), [instancia.lb, 1]])
+        self.cota_sup = np.concatenate([np.zeros(len(items)), [instancia.ub, self.num_corredores]])
+
+    @property
+    def num_variables(self) -> int:
+        return self.num_ordenes + self.num_corredores
+
+    def fijar_corredores(self, minimo: int, maximo: Optional[int] = None):
+        """
+        Acota la cantidad de corredores de la wave.
+
+        Args:
+            minimo (int): Cantidad mínima de corredores.
+            maximo (Optional[int]): Cantidad máxima (por defecto, todos los corredores).
+        """
+        self.cota_inf[self.fila_corredores] = minimo
+        self.cota_sup[self.fila_corredores] = self.num_corredores if maximo is None else maximo
+
+    def objetivo(self, lam: float = 0.0) -> np.ndarray:
+        """
+        Coeficientes del objetivo a maximizar: unidades - lam * corredores.
+
+        Args:
+            lam (float): Costo por corredor (0 maximiza sólo las unidades).
+
+        Returns:
+            np.ndarray: Coeficiente de cada variable.
+        """
+        return np.concatenate([self.instancia.orders_units.astype(float), np.full(self.num_corredores, -lam)])
+
+    def vector(self, ids_ordenes: List[int], ids_corredores: List[int]) -> np.ndarray:
+        """
+        Vector 0/1 de las variables para una selección de órdenes y corredores (por ejemplo, una solución inicial).
+        """
+        v = np.zeros(self.num_variables)
+        v[np.asarray(ids_ordenes, dtype=int)] = 1
+        v[self.num_ordenes + np.asarray(ids_corredores, dtype=int)] = 1
+        return v
+
+
+class ResultadoMILP(NamedTuple):
+    """
+    Resultado de resolver un ModeloMILP, igual para todos los backends.
+
+    Atributos:
+        estado (str): "optimo", "factible" (incumbente sin probar optimalidad), "infactible" o "sin_solucion".
+        objetivo (float): Valor del objetivo de la incumbente (nan si no hay).
+        cota (float): Cota superior del objetivo que reporta el solver (nan si no hay).
+        gap (float): Gap relativo entre incumbente y cota (nan si no hay).
+        ordenes (List[int]): Índices de las órdenes de la incumbente.
+        corredores (List[int]): Índices de los corredores de la incumbente.
+        tiempo (float): Segundos de resolución.
+    """
+    estado: str
+    objetivo: float
+    cota: float
+    gap: float
+    ordenes: List[int]
+    corredores: List[int]
+    tiempo: float
+
+    @property
+    def factible(self) -> bool:
+        return self.estado in ("optimo", "factible")
+
+    @property
+    def optimo(self) -> bool:
+        return self.estado == "optimo"
+
+
+def _resultado(modelo: ModeloMILP, estado: str, v: Optional[np.ndarray], objetivo: np.ndarray,
+               cota: float, gap: float, tiempo: float) -> ResultadoMILP:
+    if v is None:
+        return ResultadoMILP(estado, float("nan"), cota, gap, [], [], tiempo)
+    seleccion = v > 0.5
+    # El objetivo se recalcula con las variables redondeadas para no arrastrar la tolerancia del solver
+    return ResultadoMILP(estado, float(objetivo @ seleccion), cota, gap,
+                         np.flatnonzero(seleccion[:modelo.num_ordenes]).tolist(),
+                         np.flatnonzero(seleccion[modelo.num_ordenes:]).tolist(), tiempo)
+
+
+class SolverHighs:
+    """
+    Resuelve un ModeloMILP con HiGHS a través de scipy.optimize.milp, sin licencia.
+
+    scipy no expone la solución inicial ni la cantidad de hilos de HiGHS: la solución inicial se ignora y
+    el paralelismo se obtiene resolviendo varias instancias en procesos distintos.
+    """
+    nombre = "highs"
+
+    def __init__(self, modelo: ModeloMILP, hilos: Optional[int] = None, gap: Optional[float] = None, verbose: bool = False):
+        self.modelo = modelo
+        self.hilos = hilos
+        self.gap = gap
+        self.verbose = verbose
+
+    def resolver(self, objetivo: np.ndarray, tiempo_limite: Optional[float] = None,
+                 inicio: Optional[np.ndarray] = None) -> ResultadoMILP:
+        """
+        Maximiza objetivo @ [x, y] sujeto a las restricciones actuales del modelo.
+
+        Args:
+            objetivo (np.ndarray): Coeficientes a maximizar (ver ModeloMILP.objetivo).
+            tiempo_limite (Optional[float]): Segundos máximos de resolución.
+            inicio (Optional[np.ndarray]): Solución inicial (no soportada por este backend).
+
+        Returns:
+            ResultadoMILP: Incumbente, cota y gap.
+        """
+        from scipy.optimize import Bounds, LinearConstraint, milp
+        opciones = {"disp": self.verbose}
+        if tiempo_limite is not None:
+            opciones["time_limit"] = tiempo_limite
+        if self.gap is not None:
+            opciones["mip_rel_gap"] = self.gap
+        modelo = self.modelo
+        inicio_reloj = time.perf_counter()
+        r = milp(-objetivo, integrality=np.ones(modelo.num_variables), bounds=Bounds(0, 1),
+                 constraints=LinearConstraint(modelo.matriz, modelo.cota_inf, modelo.cota_sup), options=opciones)
+        tiempo = time.perf_counter() - inicio_reloj
+        # scipy minimiza: la cota dual de -objetivo es la cota superior del objetivo cambiada de signo
+        cota = -getattr(r, "mip_dual_bound", float("nan")) if r.x is not None else float("nan")
+        gap = getattr(r, "mip_gap", float("nan")) if r.x is not None else float("nan")
+        if r.x is None:
+            return _resultado(modelo, "infactible" if r.status == 2 else "sin_solucion", None, objetivo, cota, gap, tiempo)
+        return _resultado(modelo, "optimo" if r.status == 0 else "factible", r.x, objetivo, cota, gap, tiempo)
+
+
+class SolverGurobi:
+    """
+    Resuelve un ModeloMILP con Gurobi. El modelo de Gurobi se construye una sola vez con la API matricial;
+    cada llamada a resolver sólo actualiza las cotas de las filas, el objetivo y la solución inicial.
+    """
+    nombre = "gurobi"
+
+    def __init__(self, modelo: ModeloMILP, hilos: Optional[int] = None, gap: Optional[float] = None, verbose: bool = False):
+        import gurobipy as gp
+        from gurobipy import GRB
+        self.GRB = GRB
+        self.modelo = modelo
+        self.gurobi = gp.Model("Modelo_wave")
+        self.gurobi.setParam('OutputFlag', verbose)
+        if hilos is not None:
+            self.gurobi.setParam('Threads', hilos)
+        if gap is not None:
+            self.gurobi.setParam('MIPGap', gap)
+        self.v = self.gurobi.addMVar(modelo.num_variables, vtype=GRB.BINARY, name="v")
+        self.filas_inf = np.flatnonzero(np.isfinite(modelo.cota_inf))
+        self.restricciones_sup = self.gurobi.addMConstr(modelo.matriz, self.v, '<', modelo.cota_sup)
+        self.restricciones_inf = self.gurobi.addMConstr(modelo.matriz[self.filas_inf], self.v, '>',
+                                                        modelo.cota_inf[self.filas_inf])
+
+    def resolver(self, objetivo: np.ndarray, tiempo_limite: Optional[float] = None,
+                 inicio: Optional[np.ndarray] = None) -> ResultadoMILP:
+        """
+        Maximiza objetivo @ [x, y] sujeto a las restricciones actuales del modelo.
+
+        Args:
+            objetivo (np.ndarray): Coeficientes a maximizar (ver ModeloMILP.objetivo).
+            tiempo_limite (Optional[float]): Segundos máximos de resolución.
+            inicio (Optional[np.ndarray]): Solución inicial para el arranque en caliente.
+
+        Returns:
+            ResultadoMILP: Incumbente, cota y gap.
+        """
+        GRB = self.GRB
+        modelo = self.modelo
+        self.restricciones_sup.RHS = modelo.cota_sup
+        self.restricciones_inf.RHS = modelo.cota_inf[self.filas_inf]
+        self.gurobi.setObjective(objetivo @ self.v, GRB.MAXIMIZE)
+        self.gurobi.setParam('TimeLimit', GRB.INFINITY if tiempo_limite is None else tiempo_limite)
+        if inicio is not None:
+            self.v.Start = inicio
+        inicio_reloj = time.perf_counter()
+        self.gurobi.optimize()
+        tiempo = time.perf_counter() - inicio_reloj
+        if self.gurobi.SolCount == 0:
+            estado = "infactible" if self.gurobi.status == GRB.INFEASIBLE else "sin_solucion"
+            return _resultado(modelo, estado, None, objetivo, float("nan"), float("nan"), tiempo)
+        estado = "optimo" if self.gurobi.status == GRB.OPTIMAL else "factible"
+        return _resultado(modelo, estado, self.v.X, objetivo, self.gurobi.ObjBound, self.gurobi.MIPGap, tiempo)
+
+
+def backend_por_defecto() -> str:
+    """
+    Gurobi si gurobipy está instalado; si no, HiGHS.
+    """
+    try:
+        import gurobipy  # noqa: F401
+    except ImportError:
+        return "highs"
+    return "gurobi"
+
+
+def crear_solver(modelo: ModeloMILP, backend: Optional[str] = None, hilos: Optional[int] = None,
+                 gap: Optional[float] = None, verbose: bool = False):
+    """
+    Crea el solver de un modelo con el backend indicado.
+
+    Args:
+        modelo (ModeloMILP): Modelo a resolver.
+        backend (Optional[str]): Uno de BACKENDS (por defecto, backend_por_defecto()).
+        hilos (Optional[int]): Hilos del solver (None deja el valor del solver).
+        gap (Optional[float]): Gap relativo con el que el solver puede detenerse.
+        verbose (bool): Si el solver imprime su log.
+
+    Returns:
+        SolverGurobi | SolverHighs: Solver con el método resolver(objetivo, tiempo_limite, inicio).
+    """
+    backend = backend or backend_por_defecto()
+    if backend == "gurobi":
+        return SolverGurobi(modelo, hilos=hilos, gap=gap, verbose=verbose)
+    if backend == "highs":
+        return SolverHighs(modelo, hilos=hilos, gap=gap, verbose=verbose)
+    raise ValueError(f"Backend desconocido: {backend}")
@@ -0,0 +1,183 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from Instance import Instance, Solucion
+from instance_reader import read_instance
+from modelo_milp import BACKENDS
+
+METODOS = ("constructora1", "constructora2", "hiper", "exacto", "dinkelbach")
+COLUMNAS = ["instancia", "metodo", "ratio", "factible", "corredores", "ordenes", "unidades",
+            "tiempo_lectura", "tiempo_resolucion", "tiempo_total", "ordenes_reducidas", "corredores_reducidos",
+            "items_reducidos", "error"]
+
+
+def resolver(instancia: Instance, metodo: str, segundos: float, semilla: int = 0, V: float = 0.05,
+             backend: Optional[str] = None) -> Solucion:
+    """
+    Resuelve una instancia con el método indicado.
+
+    Args:
+        instancia (Instance): Instancia del problema.
+        metodo (str): Uno de METODOS.
+        segundos (float): Presupuesto de tiempo (no aplica a las constructoras).
+        semilla (int): Semilla de la hiper heurística.
+        V (float): Parámetro V de la hiper heurística.
+        backend (Optional[str]): Backend MILP de los métodos exactos ("gurobi" o "highs").
+
+    Returns:
+        Solucion: Solución encontrada. Para la hiper heurística es la mejor factible o, si no hubo, la mejor penalizada.
+    """
+    if metodo == "constructora1":
+        return instancia.constructora1()
+    if metodo == "constructora2":
+        return instancia.constructora2()
+    if metodo == "hiper":
+        from hiper_heuristica import HiperHeuristica
+        from Low_levels import instanciar_low_levels
+        hiper = HiperHeuristica(instancia=instancia, V=V, low_levels=instanciar_low_levels(), duracion=segundos, semilla=semilla)
+        return hiper.implementar() or hiper.mejor_sol
+    if metodo == "exacto":
+        from Exact_sol import exact_solution
+        # Un hilo por solver: el paralelismo del lote viene de los procesos
+        _, ids_ordenes, ids_corredores = exact_solution(instancia, tiempo_limite=segundos, verbose=False, backend=backend, hilos=1)
+        return Solucion([instancia.orders[o] for o in ids_ordenes], [instancia.runners[a] for a in ids_corredores], instancia)
+    if metodo == "dinkelbach":
+        from Exact_sol import exact_solution_dinkelbach
+        _, ids_ordenes, ids_corredores = exact_solution_dinkelbach(instancia, tiempo_limite=segundos, verbose=False,
+                                                                   backend=backend, hilos=1)
+        return Solucion([instancia.orders[o] for o in ids_ordenes], [instancia.runners[a] for a in ids_corredores], instancia)
+    raise ValueError(f"Método desconocido: {metodo}")
+
+
+def resolver_archivo(ruta: str, metodo: str, segundos: float, semilla: int = 0, V: float = 0.05,
+                     backend: Optional[str] = None, reducir: bool = False) -> Dict:
+    """
+    Lee y resuelve una instancia; es la tarea que ejecuta cada proceso del lote. Los errores se reportan
+    en la fila en vez de propagarse, para que una instancia no detenga el lote. Con reducir, el método
+    resuelve la instancia reducida (Instance.reduce) y la solución se traduce a los ids originales.
+
+    Returns:
+        Dict: Fila de resultados con las columnas de COLUMNAS.
+    """
+    fila = dict.fromkeys(COLUMNAS, None)
+    fila.update(instancia=ruta, metodo=metodo)
+    inicio = time.perf_counter()
+    try:
+        instancia = read_instance(ruta)
+        leida = time.perf_counter()
+        if reducir:
+            instancia = instancia.reduce()
+            e = instancia.estadisticas_reduccion
+            fila.update(ordenes_reducidas=e["ordenes_reducidas"], corredores_reducidos=e["corredores_reducidos"],
+                        items_reducidos=e["items_reducidos"])
+        solucion = instancia.solucion_original(resolver(instancia, metodo, segundos, semilla, V, backend))
+        fin = time.perf_counter()
+        fila.update(ratio=solucion.objective_value, factible=solucion.is_factible, corredores=solucion.num_runners,
+                    ordenes=solucion.num_orders, unidades=solucion.total_units_order,
+                    tiempo_lectura=leida - inicio, tiempo_resolucion=fin - leida)
+    except Exception as e:
+        fila["error"] = f"{type(e).__name__}: {e}"
+    fila["tiempo_total"] = time.perf_counter() - inicio
+    return fila
+
+
+class EscritorResultados:
+    """
+    Escribe las filas de resultados a medida que llegan, en CSV o JSONL según la extensión del archivo,
+    vaciando el buffer después de cada fila para no perder resultados si el lote se interrumpe.
+    """
+    def __init__(self, ruta: str):
+        self.archivo = open(ruta, "w", newline="", encoding="utf-8")
+        self.jsonl = ruta.endswith(".jsonl")
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.archivo, fieldnames=COLUMNAS)
+            self.csv.writeheader()
+
+    def escribir(self, fila: Dict):
+        if self.jsonl:
+            self.archivo.write(json.dumps(fila, ensure_ascii=False) + "\n")
+        else:
+            self.csv.writerow(fila)
+        self.archivo.flush()
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+def resolver_lote(rutas: List[str], metodo: str, segundos: float, salida: str, procesos: Optional[int] = None,
+                  semilla: int = 0, V: float = 0.05, backend: Optional[str] = None, reducir: bool = False) -> List[Dict]:
+    """
+    Resuelve todas las instancias en un pool de procesos. Cada proceso lee su propia instancia, de modo
+    que la lectura de las siguientes se superpone con la resolución de las que están en curso.
+
+    Args:
+        rutas (List[str]): Archivos .txt de instancias.
+        metodo (str): Uno de METODOS.
+        segundos (float): Presupuesto de tiempo por instancia.
+        salida (str): Archivo .csv o .jsonl de resultados.
+        procesos (Optional[int]): Tamaño del pool (por defecto, uno por CPU).
+        semilla (int): Semilla de la hiper heurística.
+        V (float): Parámetro V de la hiper heurística.
+        backend (Optional[str]): Backend MILP de los métodos exactos ("gurobi" o "highs").
+        reducir (bool): Si se resuelve la instancia reducida con Instance.reduce.
+
+    Returns:
+        List[Dict]: Filas de resultados, en el orden en que terminaron.
+    """
+    filas = []
+    escritor = EscritorResultados(salida)
+    try:
+        with ProcessPoolExecutor(max_workers=procesos or os.cpu_count()) as pool:
+            futuros = [pool.submit(resolver_archivo, ruta, metodo, segundos, semilla, V, backend, reducir) for ruta in rutas]
+            for futuro in as_completed(futuros):
+                fila = futuro.result()
+                escritor.escribir(fila)
+                filas.append(fila)
+                if fila["error"]:
+                    print(f"{fila['instancia']}: {fila['error']}")
+                else:
+                    print(f"{fila['instancia']}: ratio = {fila['ratio']:.4f}, factible = {fila['factible']}, "
+                          f"corredores = {fila['corredores']}, unidades = {fila['unidades']}, tiempo = {fila['tiempo_total']:.1f} s")
+    finally:
+        escritor.cerrar()
+    return filas
+
+
+def expandir_rutas(rutas: List[str]) -> List[str]:
+    """
+    Expande directorios a la lista ordenada de archivos .txt que contienen.
+    """
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos.extend(os.path.join(ruta, nombre) for nombre in sorted(os.listdir(ruta)) if nombre.endswith(".txt"))
+        else:
+            archivos.append(ruta)
+    return archivos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resuelve en paralelo todas las instancias de uno o más directorios.")
+    parser.add_argument("rutas", nargs="*", default=["datasets/a", "datasets/b"], help="Directorios o archivos .txt de instancias.")
+    parser.add_argument("--metodo", choices=METODOS, default="constructora2")
+    parser.add_argument("--segundos", type=float, default=60, help="Presupuesto de tiempo por instancia.")
+    parser.add_argument("--procesos", type=int, default=None, help="Tamaño del pool de procesos (por defecto, uno por CPU).")
+    parser.add_argument("--salida", default="resultados.csv", help="Archivo de resultados (.csv o .jsonl).")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--V", type=float, default=0.05)
+    parser.add_argument("--backend", choices=BACKENDS, default=None,
+                        help="Backend MILP de los métodos exactos (por defecto, Gurobi si está instalado).")
+    parser.add_argument("--reducir", action="store_true", help="Resuelve la instancia reducida (Instance.reduce).")
+    args = parser.parse_args()
+
+    resolver_lote(expandir_rutas(args.rutas), args.metodo, args.segundos, args.salida,
+                  procesos=args.procesos, semilla=args.semilla, V=args.V, backend=args.backend, reducir=args.reducir)
+
+
+if __name__ == "__main__":
+    main()